@@ -0,0 +1,198 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Expired rows are purged from the disk tier at most this often
+DISK_PURGE_INTERVAL_SECONDS = 3600
+
+
+class ExplanationCache:
+    """
+    Two-tier cache of generated job match explanations.
+
+    Keys are built from the normalized query, the normalized skill set and
+    the job_id. The in-memory tier is an LRU bounded by max_entries; the
+    optional SQLite tier persists across restarts and is bounded by
+    max_disk_entries. Entries older than ttl_seconds are treated as misses
+    in both tiers.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        disk_path: Optional[str] = None,
+        max_disk_entries: Optional[int] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("EXPLANATION_CACHE_MAX_ENTRIES", 10000))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("EXPLANATION_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+        if disk_path is None:
+            disk_path = os.getenv("EXPLANATION_CACHE_PATH", "./data/cache/explanation_cache.db")
+        self.disk_path = disk_path or None
+        self.max_disk_entries = max_disk_entries or int(os.getenv("EXPLANATION_CACHE_MAX_DISK_ENTRIES", 500000))
+
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        # Upper bound on the disk tier's row count; a full COUNT runs only when it passes the ceiling
+        self._disk_rows = 0
+        self._last_purge = 0.0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(query: str, skills: Optional[str], job_id, namespace: str = "") -> str:
+        """
+        Build a cache key from the normalized query, skills and job_id.
+
+        Args:
+            query: The user's search query
+            skills: Optional comma-separated skills
+            job_id: The job being explained
+            namespace: Extra discriminator such as the model name and prompt mode
+        """
+        normalized_query = ' '.join(query.lower().split())
+        normalized_skills = ','.join(sorted({
+            skill.strip().lower() for skill in (skills or '').split(',') if skill.strip()
+        }))
+        raw = '\x1f'.join([namespace, normalized_query, normalized_skills, str(job_id)])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the disk tier on first use"""
+        if not self.disk_path:
+            return None
+        if self._db is None:
+            directory = os.path.dirname(self.disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS explanations ("
+                "key TEXT PRIMARY KEY, explanation TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS explanations_created_at ON explanations (created_at)")
+            self._db.commit()
+            (self._disk_rows,) = self._db.execute("SELECT COUNT(*) FROM explanations").fetchone()
+        return self._db
+
+    def _store(self, key: str, explanation: str, created_at: float):
+        """Insert into the memory tier, evicting LRU entries. Caller holds the lock."""
+        self._entries[key] = (explanation, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached explanation for key, or None if missing or expired"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Look up several keys, reading any memory misses from disk in one query.
+
+        Returns:
+            Cached explanations keyed by key; missing or expired keys are absent
+        """
+        now = time.time()
+        found: Dict[str, str] = {}
+        with self._lock:
+            pending = []
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    explanation, created_at = entry
+                    if now - created_at <= self.ttl_seconds:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        found[key] = explanation
+                        continue
+                    del self._entries[key]
+                    self.expirations += 1
+                pending.append(key)
+
+            from_disk = 0
+            db = self._connect()
+            if db is not None:
+                for i in range(0, len(pending), 500):
+                    chunk = pending[i:i + 500]
+                    rows = db.execute(
+                        f"SELECT key, explanation, created_at FROM explanations "
+                        f"WHERE key IN ({','.join('?' * len(chunk))}) AND created_at >= ?",
+                        chunk + [now - self.ttl_seconds]
+                    )
+                    for key, explanation, created_at in rows:
+                        self._store(key, explanation, created_at)
+                        found[key] = explanation
+                        from_disk += 1
+
+            self.disk_hits += from_disk
+            self.misses += len(pending) - from_disk
+        return found
+
+    def put(self, key: str, explanation: str):
+        """Store an explanation in both tiers"""
+        self.put_many({key: explanation})
+
+    def put_many(self, explanations: Dict[str, str]):
+        """Store several explanations in both tiers with a single disk transaction"""
+        if not explanations:
+            return
+        now = time.time()
+        with self._lock:
+            for key, explanation in explanations.items():
+                self._store(key, explanation, now)
+
+            db = self._connect()
+            if db is not None:
+                db.executemany(
+                    "INSERT OR REPLACE INTO explanations (key, explanation, created_at) VALUES (?, ?, ?)",
+                    [(key, explanation, now) for key, explanation in explanations.items()]
+                )
+                # Replacements are counted too, so this only ever overestimates
+                self._disk_rows += len(explanations)
+                if self._disk_rows > self.max_disk_entries or now - self._last_purge > DISK_PURGE_INTERVAL_SECONDS:
+                    self._evict_disk(db, now)
+                db.commit()
+
+    def _evict_disk(self, db: sqlite3.Connection, now: float):
+        """Purge expired rows and trim the disk tier to max_disk_entries. Caller holds the lock."""
+        db.execute("DELETE FROM explanations WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._last_purge = now
+        (count,) = db.execute("SELECT COUNT(*) FROM explanations").fetchone()
+        if count > self.max_disk_entries:
+            # Trim below the ceiling so the next full count is not right behind
+            excess = count - int(self.max_disk_entries * 0.9)
+            db.execute(
+                "DELETE FROM explanations WHERE key IN "
+                "(SELECT key FROM explanations ORDER BY created_at LIMIT ?)",
+                (excess,)
+            )
+            count -= excess
+        self._disk_rows = count
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_enabled": bool(self.disk_path)
+            }
@@ -1,55 +1,107 @@
+import asyncio
+import json
 import logging
 import os
 from google import genai
-from typing import List, Dict
-import logging
-import traceback
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
+from agent.explanation_cache import ExplanationCache
 
 # Configure logging to show all information
 logging.basicConfig(
-    level=logging.INFO, 
+    level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     force=True  # This will override any existing configuration
 )
 logger = logging.getLogger(__name__)
 
+NO_EXPLANATION = "No explanation available."
+
 class GeminiService:
-    def __init__(self):
-        # Set the API key
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY environment variable is not set")
-        
-        # Initialize the client
-        self.client = genai.Client(api_key=api_key)
-    
-    def explain_job_matches(self, query: str, jobs: List[Dict], skills: str = None):
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        model: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        mode: Optional[str] = None,
+        cache: Optional[ExplanationCache] = None
+    ):
         """
-        Generate explanations for why these jobs match the user's query
-        
         Args:
-            query: The user's original search query
-            jobs: List of job matches from the retriever
-            skills: Optional comma-separated skills
-        
+            client: Optional client exposing the google-genai interface
+                (client.models.generate_content and client.aio.models.generate_content).
+                Pass a local fake to test without network access.
+            model: Gemini model name
+            max_concurrency: Maximum number of explanation requests in flight at once
+            timeout: Per-call timeout in seconds for async requests
+            mode: 'per_job' (one request per job) or 'single_prompt' (all jobs in one request)
+            cache: Explanation cache; a default in-memory + SQLite cache is created if omitted
+        """
+        if client is None:
+            # Set the API key
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise ValueError("GOOGLE_API_KEY environment variable is not set")
+
+            # Initialize the client
+            client = genai.Client(api_key=api_key)
+        self.client = client
+
+        self.model = model or os.getenv("GEMINI_MODEL", "gemini-2.0-flash-001")
+        self.max_concurrency = max_concurrency or int(os.getenv("GEMINI_MAX_CONCURRENCY", 8))
+        self.timeout = timeout or float(os.getenv("GEMINI_TIMEOUT_SECONDS", 15))
+        self.mode = mode or os.getenv("GEMINI_EXPLANATION_MODE", "per_job")
+        if self.mode not in ("per_job", "single_prompt"):
+            raise ValueError(f"Unknown explanation mode: {self.mode}")
+
+        self.cache = cache if cache is not None else ExplanationCache()
+
+        # Shared by every request so max_concurrency bounds the whole service;
+        # created on first use because a semaphore belongs to one event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """The service-wide request semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _split_cached(self, query: str, skills: Optional[str], jobs: List[Dict]) -> Tuple[Dict[str, str], List[Dict]]:
+        """
+        Look up cached explanations.
+
         Returns:
-            Dictionary with job IDs as keys and explanations as values
+            (explanations found in the cache keyed by job_id, jobs still needing one)
         """
-        # Skip if no jobs
-        if not jobs:
-            return {}
-        
-        # Create context for Gemini
+        namespace = f"{self.model}:{self.mode}"
+        keys = {str(job['job_id']): self.cache.make_key(query, skills, job['job_id'], namespace) for job in jobs}
+        found = self.cache.get_many(list(keys.values()))
+        cached = {job_id: found[key] for job_id, key in keys.items() if key in found}
+        pending = [job for job in jobs if str(job['job_id']) not in cached]
+        return cached, pending
+
+    def _cache_generated(self, query: str, skills: Optional[str], explanations: Dict[str, str]):
+        """Cache newly generated explanations, skipping failures so they are retried"""
+        namespace = f"{self.model}:{self.mode}"
+        self.cache.put_many({
+            self.cache.make_key(query, skills, job_id, namespace): explanation
+            for job_id, explanation in explanations.items()
+            if explanation != NO_EXPLANATION
+        })
+
+    def _build_user_context(self, query: str, skills: Optional[str]) -> str:
+        """Describe the user's search for the prompt"""
         user_context = f"Search query: '{query}'"
         if skills:
             user_context += f"\nSkills: {skills}"
-        
-        job_explanations = {}
-        
-        # Process each job to get personalized explanation
-        for job in jobs:
-            # Create a prompt for Gemini to explain the match
-            prompt = f"""
+        return user_context
+
+    def _build_prompt(self, user_context: str, job: Dict) -> str:
+        """Prompt asking Gemini to explain a single job match"""
+        return f"""
             {user_context}
 
             I'm looking at this job listing:
@@ -58,39 +110,219 @@ class GeminiService:
             - Location: {job['location']}
             - Remote: {'Yes' if job['remote'] else 'No'}
             - Skills: {job['skills']}
-            
-            Provide a brief, personalized explanation (2-3 sentences) of why this job is a good match for my search query. 
+
+            Provide a brief, personalized explanation (2-3 sentences) of why this job is a good match for my search query.
+            Focus on how the job requirements align with my query and skills. Be specific about the match quality.
+            """
+
+    def _build_batch_prompt(self, user_context: str, jobs: List[Dict]) -> str:
+        """Prompt asking Gemini to explain every job match in one structured response"""
+        listings = "\n".join(
+            f"""
+            - Job ID: {job['job_id']}
+              Title: {job['title']}
+              Company: {job['company']}
+              Location: {job['location']}
+              Remote: {'Yes' if job['remote'] else 'No'}
+              Skills: {job['skills']}"""
+            for job in jobs
+        )
+        return f"""
+            {user_context}
+
+            I'm looking at these job listings:
+            {listings}
+
+            For each job, provide a brief, personalized explanation (2-3 sentences) of why it is a good match for my search query.
             Focus on how the job requirements align with my query and skills. Be specific about the match quality.
+            Respond with JSON only, in the form:
+            {{"explanations": [{{"job_id": "<job id>", "explanation": "<explanation>"}}]}}
             """
+
+    def _extract_text(self, response) -> str:
+        """Extract the generated text from a Gemini response"""
+        if hasattr(response, 'text') and response.text:
+            return response.text.strip()
+        if hasattr(response, 'parts') and response.parts:
+            return response.parts[0].text.strip()
+        logger.info(f"Full response: {response}")
+        return "Could not extract explanation from response."
+
+    def explain_job_matches(self, query: str, jobs: List[Dict], skills: str = None):
+        """
+        Generate explanations for why these jobs match the user's query
+
+        Blocking, one request per job. Prefer explain_job_matches_async from async code.
+
+        Args:
+            query: The user's original search query
+            jobs: List of job matches from the retriever
+            skills: Optional comma-separated skills
+
+        Returns:
+            Dictionary with job IDs as keys and explanations as values
+        """
+        # Skip if no jobs
+        if not jobs:
+            return {}
+
+        # Serve repeat (query, skills, job) triples from the cache
+        cached, pending = self._split_cached(query, skills, jobs)
+
+        # Create context for Gemini
+        user_context = self._build_user_context(query, skills)
+
+        job_explanations = {}
+
+        # Process each job to get personalized explanation
+        for job in pending:
+            # Create a prompt for Gemini to explain the match
+            prompt = self._build_prompt(user_context, job)
             logging.info(f"Prompt for job {job['job_id']}: {prompt}")
 
             try:
                 # Get response from Gemini
                 response = self.client.models.generate_content(
-                    model="gemini-2.0-flash-001",
+                    model=self.model,
                     contents=prompt,
                 )
-                # Debug the response object structure
-                logger.info(f"Response type: {type(response)}")
-                logger.info(f"Response attributes: {dir(response)}")
-                
-                # Extract the explanation based on the actual response structure
-                if hasattr(response, 'text'):
-                    explanation = response.text
-                elif hasattr(response, 'parts') and response.parts:
-                    explanation = response.parts[0].text
-                else:
-                    # Inspect the response more deeply
-                    logger.info(f"Full response: {response}")
-                    explanation = "Could not extract explanation from response."
-                
-                explanation = explanation.strip()
+                explanation = self._extract_text(response)
                 job_explanations[str(job['job_id'])] = explanation
-                
+
                 logger.info(f"Generated explanation for job {job['job_id']}: {explanation}")
 
             except Exception as e:
                 print(f"Error getting explanation for job {job['job_id']}: {e}")
-                job_explanations[str(job['job_id'])] = "No explanation available."
-        
-        return job_explanations
\ No newline at end of file
+                job_explanations[str(job['job_id'])] = NO_EXPLANATION
+
+        self._cache_generated(query, skills, job_explanations)
+        job_explanations.update(cached)
+        return job_explanations
+
+    async def _explain_one(self, user_context: str, job: Dict) -> Tuple[str, str]:
+        """Request one explanation, bounded by the service semaphore and the per-call timeout"""
+        job_id = str(job['job_id'])
+        prompt = self._build_prompt(user_context, job)
+
+        async with self._get_semaphore():
+            try:
+                response = await asyncio.wait_for(
+                    self.client.aio.models.generate_content(
+                        model=self.model,
+                        contents=prompt,
+                    ),
+                    timeout=self.timeout
+                )
+                explanation = self._extract_text(response)
+                logger.info(f"Generated explanation for job {job_id}: {explanation}")
+                return job_id, explanation
+            except asyncio.TimeoutError:
+                print(f"Timed out after {self.timeout}s getting explanation for job {job_id}")
+            except Exception as e:
+                print(f"Error getting explanation for job {job_id}: {e}")
+        return job_id, NO_EXPLANATION
+
+    async def _explain_in_single_prompt(self, user_context: str, jobs: List[Dict]) -> Dict[str, str]:
+        """Explain all jobs with one request returning structured per-job_id output"""
+        job_ids = [str(job['job_id']) for job in jobs]
+        explanations = {job_id: NO_EXPLANATION for job_id in job_ids}
+        prompt = self._build_batch_prompt(user_context, jobs)
+
+        try:
+            async with self._get_semaphore():
+                response = await asyncio.wait_for(
+                    self.client.aio.models.generate_content(
+                        model=self.model,
+                        contents=prompt,
+                        config={"response_mime_type": "application/json"},
+                    ),
+                    timeout=self.timeout
+                )
+            payload = json.loads(self._extract_text(response))
+            for item in payload.get("explanations", []):
+                job_id = str(item.get("job_id"))
+                if job_id in explanations and item.get("explanation"):
+                    explanations[job_id] = item["explanation"].strip()
+        except asyncio.TimeoutError:
+            print(f"Timed out after {self.timeout}s getting explanations for {len(jobs)} jobs")
+        except Exception as e:
+            print(f"Error getting explanations for {len(jobs)} jobs: {e}")
+
+        return explanations
+
+    async def iter_explanations(
+        self,
+        query: str,
+        jobs: List[Dict],
+        skills: str = None
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Yield (job_id, explanation) pairs as soon as each one is available
+
+        Cached explanations are yielded first. In 'per_job' mode the rest are
+        requested concurrently (at most max_concurrency in flight across the service) and yielded
+        in completion order; in 'single_prompt' mode they arrive together from
+        one request.
+
+        Args:
+            query: The user's original search query
+            jobs: List of job matches from the retriever
+            skills: Optional comma-separated skills
+        """
+        if not jobs:
+            return
+
+        # Serve repeat (query, skills, job) triples from the cache; the disk
+        # tier is SQLite, so lookups and writes run off the event loop
+        cached, pending = await asyncio.to_thread(self._split_cached, query, skills, jobs)
+        for job_id, explanation in cached.items():
+            yield job_id, explanation
+        if not pending:
+            return
+
+        user_context = self._build_user_context(query, skills)
+
+        if self.mode == "single_prompt":
+            generated = await self._explain_in_single_prompt(user_context, pending)
+            await asyncio.to_thread(self._cache_generated, query, skills, generated)
+            for job_id, explanation in generated.items():
+                yield job_id, explanation
+            return
+
+        tasks = [
+            asyncio.ensure_future(self._explain_one(user_context, job))
+            for job in pending
+        ]
+        generated = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                job_id, explanation = await next_done
+                generated[job_id] = explanation
+                yield job_id, explanation
+            # One cache write per request
+            await asyncio.to_thread(self._cache_generated, query, skills, generated)
+            generated = {}
+        finally:
+            # Stop outstanding requests if the consumer goes away (e.g. client disconnect)
+            for task in tasks:
+                task.cancel()
+            # Keep what was generated before the disconnect, written in the background
+            if generated:
+                asyncio.get_running_loop().run_in_executor(None, self._cache_generated, query, skills, generated)
+
+    async def explain_job_matches_async(self, query: str, jobs: List[Dict], skills: str = None) -> Dict[str, str]:
+        """
+        Generate explanations for why these jobs match the user's query without blocking the event loop
+
+        Args:
+            query: The user's original search query
+            jobs: List of job matches from the retriever
+            skills: Optional comma-separated skills
+
+        Returns:
+            Dictionary with job IDs as keys and explanations as values
+        """
+        return {
+            job_id: explanation
+            async for job_id, explanation in self.iter_explanations(query, jobs, skills)
+        }
@@ -1,15 +1,25 @@
 # app.py (FastAPI backend)
+from dotenv import load_dotenv
+
+# Load environment variables from .env file before the project modules,
+# which read their settings at import time
+load_dotenv()
+
 from fastapi import FastAPI
-from pydantic import BaseModel
-from typing import List, Optional, Union
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, field_validator
+from typing import Dict, List, Optional, Union
 import uvicorn
 from retrieval.retrieval import JobRetriever
+from normalizers import normalizer_cache_stats
 from agent.gemini_client import GeminiService
-from dotenv import load_dotenv
+import asyncio
+import json
 import os
-
-# Load environment variables from .env file
-load_dotenv()
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Define data models
 class JobSearchRequest(BaseModel):
@@ -17,7 +27,23 @@ class JobSearchRequest(BaseModel):
     location: Optional[str] = None
     remote: Optional[bool] = False
     skills: Optional[str] = None
+    radius_miles: Optional[float] = None
+    strict_location: Optional[bool] = False
+    companies: Optional[List[str]] = None
+    exclude_companies: Optional[List[str]] = None
     num_results: Optional[int] = 5
+    weights: Optional[Dict[str, float]] = None
+
+    @field_validator("query")
+    @classmethod
+    def query_not_blank(cls, query: str) -> str:
+        if not query.strip():
+            raise ValueError("query must not be blank")
+        return query
+
+class BatchSearchRequest(BaseModel):
+    searches: List[JobSearchRequest]
+    explain: Optional[bool] = False
 
 class JobResult(BaseModel):
     title: str
@@ -31,6 +57,62 @@ class JobResult(BaseModel):
     document: str
     explanation: Optional[str] = None
 
+class InstrumentedExecutor:
+    """
+    Thread pool for blocking work that tracks queued and running tasks,
+    so saturation is observable through /stats.
+    """
+
+    def __init__(self, max_workers: int, name: str):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking function on the pool without blocking the event loop"""
+        submitted_at = time.monotonic()
+        with self._lock:
+            self.queued += 1
+
+        def task():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait_seconds += time.monotonic() - submitted_at
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+            return result
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+
+    def stats(self) -> dict:
+        """Return current queue depth and cumulative counters"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_seconds": self.total_wait_seconds / self.completed if self.completed else 0.0
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
 # Initialize FastAPI app
 app = FastAPI(title="LinkedIn Job Search API")
 
@@ -38,10 +120,22 @@ app = FastAPI(title="LinkedIn Job Search API")
 retriever = JobRetriever()
 gemini_service = GeminiService()
 
-# Define API endpoints
-@app.post("/search", response_model=List[JobResult])
-async def search_jobs(request: JobSearchRequest):
-    """Search for jobs based on query and filters"""
+# Retrieval (embedding + Chroma + reranking) is CPU-bound and synchronous,
+# so it runs on a dedicated pool; LLM calls are awaited on the event loop.
+retrieval_executor = InstrumentedExecutor(
+    max_workers=int(os.getenv("RETRIEVAL_EXECUTOR_WORKERS", min(4, os.cpu_count() or 1))),
+    name="retrieval"
+)
+
+# Upper bound on job IDs accepted by one /jobs request
+MAX_BULK_JOB_IDS = int(os.getenv("MAX_BULK_JOB_IDS", 500))
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    retrieval_executor.shutdown()
+
+def _build_filters(request: JobSearchRequest) -> dict:
+    """Translate a search request into retriever filters"""
     filters = {}
     if request.location:
         filters["location"] = request.location
@@ -49,20 +143,56 @@ async def search_jobs(request: JobSearchRequest):
         filters["remote"] = request.remote
     if request.skills:
         filters["skills"] = request.skills
-    
+    if request.radius_miles:
+        filters["radius_miles"] = request.radius_miles
+    if request.strict_location:
+        filters["strict_location"] = request.strict_location
+    if request.companies:
+        filters["companies"] = request.companies
+    if request.exclude_companies:
+        filters["exclude_companies"] = request.exclude_companies
+    return filters
+
+def _run_search(request: JobSearchRequest) -> List[dict]:
+    """Run retrieval for a search request"""
     results = retriever.search_jobs(
         request.query, 
-        filters, 
-        n_results=request.num_results
+        _build_filters(request), 
+        n_results=request.num_results,
+        weights=request.weights
     )
 
-        # Convert job_id to string in each result
+    # Convert job_id to string in each result
     for result in results:
         result["job_id"] = str(result["job_id"])
+    return results
+
+def _run_search_batch(requests: List[JobSearchRequest]) -> List[List[dict]]:
+    """Run retrieval for many search requests in one pass"""
+    batch_results = retriever.search_jobs_batch([
+        {
+            "query": request.query,
+            "filters": _build_filters(request),
+            "n_results": request.num_results,
+            "weights": request.weights
+        }
+        for request in requests
+    ])
+
+    for results in batch_results:
+        for result in results:
+            result["job_id"] = str(result["job_id"])
+    return batch_results
+
+# Define API endpoints
+@app.post("/search", response_model=List[JobResult])
+async def search_jobs(request: JobSearchRequest):
+    """Search for jobs based on query and filters"""
+    results = await retrieval_executor.run(_run_search, request)
     
     # Get explanations from Gemini
     if results:
-        explanations = gemini_service.explain_job_matches(
+        explanations = await gemini_service.explain_job_matches_async(
             query=request.query,
             jobs=results,
             skills=request.skills
@@ -76,14 +206,88 @@ async def search_jobs(request: JobSearchRequest):
     
     return results
 
+@app.post("/search/batch", response_model=List[List[JobResult]])
+async def search_jobs_batch(request: BatchSearchRequest):
+    """
+    Run many searches in one pass, e.g. for recommendation sweeps.
+    
+    Explanations are skipped unless explain is set, since bulk callers rarely need them.
+    """
+    batch_results = await retrieval_executor.run(_run_search_batch, request.searches)
+    
+    if request.explain:
+        explanations = await asyncio.gather(*(
+            gemini_service.explain_job_matches_async(
+                query=search.query,
+                jobs=results,
+                skills=search.skills
+            )
+            for search, results in zip(request.searches, batch_results)
+        ))
+        for results, search_explanations in zip(batch_results, explanations):
+            for result in results:
+                result["explanation"] = search_explanations.get(result["job_id"])
+    
+    return batch_results
+
+@app.post("/search/stream")
+async def search_jobs_stream(request: JobSearchRequest):
+    """
+    Search for jobs, streaming newline-delimited JSON events.
+    
+    The first event carries the ranked results ({"type": "results"}), then one
+    {"type": "explanation"} event follows per job as each explanation
+    completes, and a final {"type": "done"} event closes the stream.
+    """
+    results = await retrieval_executor.run(_run_search, request)
+    
+    async def event_stream():
+        payload = [jsonable_encoder(JobResult(**result)) for result in results]
+        yield json.dumps({"type": "results", "results": payload}) + "\n"
+        
+        async for job_id, explanation in gemini_service.iter_explanations(
+            query=request.query,
+            jobs=results,
+            skills=request.skills
+        ):
+            yield json.dumps({"type": "explanation", "job_id": job_id, "explanation": explanation}) + "\n"
+        
+        yield json.dumps({"type": "done"}) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
 @app.get("/job/{job_id}")
 async def get_job(job_id: str):
     """Get details for a specific job"""
-    job = retriever.get_job_by_id(job_id)
+    job = await retrieval_executor.run(retriever.get_job_by_id, job_id)
     if not job:
         return {"error": "Job not found"}
     return job
 
+@app.get("/jobs")
+async def get_jobs(ids: str):
+    """Get details for many jobs, given as comma-separated job IDs"""
+    job_ids = list(dict.fromkeys(job_id.strip() for job_id in ids.split(",") if job_id.strip()))
+    if len(job_ids) > MAX_BULK_JOB_IDS:
+        return {"error": f"At most {MAX_BULK_JOB_IDS} job IDs per request"}
+    
+    jobs = await retrieval_executor.run(retriever.get_jobs_by_ids, job_ids)
+    return {
+        "jobs": [jobs[job_id] for job_id in job_ids if job_id in jobs],
+        "missing": [job_id for job_id in job_ids if job_id not in jobs]
+    }
+
+@app.get("/stats")
+async def get_stats():
+    """Cache, executor, search depth and normalizer statistics for monitoring"""
+    return {
+        "embedding_cache": retriever.embedding_cache.stats(),
+        "explanation_cache": gemini_service.cache.stats(),
+        "retrieval_executor": retrieval_executor.stats(),
+        "search_depth": retriever.search_telemetry.stats(),
+        "normalizers": normalizer_cache_stats()
+    }
+
 @app.get("/")
 async def root():
     """Root endpoint to verify API is working"""
@@ -0,0 +1,3 @@
+"""
+Embedding module for encoding job data with sentence-transformer models.
+"""
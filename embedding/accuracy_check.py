@@ -0,0 +1,91 @@
+import os
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from embedding.models import load_embedding_model
+from preprocess.artifacts import load_jobs
+
+MODEL_NAME = 'TechWolf/JobBERT-v2'
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k most similar corpus rows for each query, unordered"""
+    scores = queries @ corpus.T
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+def _latency(model, texts: List[str], batch_size: int) -> Dict[str, float]:
+    """Median single-text latency and bulk throughput of a model"""
+    single = []
+    for text in texts[:50]:
+        started = time.perf_counter()
+        model.encode([text], show_progress_bar=False)
+        single.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    elapsed = time.perf_counter() - started
+    return {
+        "single_query_ms_p50": float(np.median(single) * 1000),
+        "bulk_texts_per_second": len(texts) / elapsed
+    }
+
+def check_backend_accuracy(
+    backend: str,
+    texts: Optional[List[str]] = None,
+    queries: Optional[List[str]] = None,
+    k: int = 10,
+    batch_size: int = 32
+) -> Dict[str, Any]:
+    """
+    Compare a backend's embeddings and top-k neighbours with the torch reference.
+
+    Args:
+        backend: Backend to check, e.g. 'onnx-int8'
+        texts: Corpus texts; defaults to a sample of job titles and skills from the cleaned postings
+        queries: Query texts; defaults to the first 100 corpus texts
+        k: Neighbours compared per query
+        batch_size: Model batch size
+
+    Returns:
+        Cosine similarity between reference and backend embeddings (mean and
+        min), mean top-k overlap with the reference neighbours, and latency /
+        throughput of both models
+    """
+    if texts is None:
+        sample_size = int(os.getenv("EMBEDDING_CHECK_SAMPLE_SIZE", 2000))
+        jobs = load_jobs(columns=['title_normalized', 'combined_skills'])
+        jobs = jobs.sample(n=min(sample_size // 2, len(jobs)), random_state=0)
+        texts = list(dict.fromkeys(jobs['title_normalized'].dropna().tolist() + jobs['combined_skills'].dropna().tolist()))
+    queries = queries or texts[:100]
+    k = min(k, len(texts))
+
+    reference = load_embedding_model(MODEL_NAME, 'torch')
+    candidate = load_embedding_model(MODEL_NAME, backend)
+
+    reference_corpus = _normalize_rows(reference.encode(texts, batch_size=batch_size, show_progress_bar=False))
+    candidate_corpus = _normalize_rows(candidate.encode(texts, batch_size=batch_size, show_progress_bar=False))
+    cosine = np.sum(reference_corpus * candidate_corpus, axis=1)
+
+    reference_top = _top_k(_normalize_rows(reference.encode(queries, show_progress_bar=False)), reference_corpus, k)
+    candidate_top = _top_k(_normalize_rows(candidate.encode(queries, show_progress_bar=False)), candidate_corpus, k)
+    overlap = [len(set(r) & set(c)) / k for r, c in zip(reference_top.tolist(), candidate_top.tolist())]
+
+    return {
+        "backend": backend,
+        "texts": len(texts),
+        "queries": len(queries),
+        "cosine_mean": float(cosine.mean()),
+        "cosine_min": float(cosine.min()),
+        f"top{k}_overlap_mean": float(np.mean(overlap)),
+        "reference_latency": _latency(reference, texts, batch_size),
+        "backend_latency": _latency(candidate, texts, batch_size)
+    }
+
+if __name__ == "__main__":
+    report = check_backend_accuracy(os.getenv("EMBEDDING_CHECK_BACKEND", "onnx-int8"))
+    for key, value in report.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Process-wide LRU cache of text embeddings.
+    
+    Entries are keyed by (namespace, normalized text), where the namespace is
+    normally the model name, and evicted least-recently-used first once the
+    memory ceiling is reached. An optional SQLite file acts as a second tier
+    that survives restarts.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, disk_path: Optional[str] = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("EMBEDDING_CACHE_MAX_MB", 64)) * 1024 * 1024)
+        if disk_path is None:
+            disk_path = os.getenv("EMBEDDING_CACHE_PATH") or None
+        
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Collapse whitespace so trivially different strings share an entry"""
+        return ' '.join(text.split())
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the disk tier on first use"""
+        if not self.disk_path:
+            return None
+        if self._db is None:
+            directory = os.path.dirname(self.disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "namespace TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (namespace, text))"
+            )
+            self._db.commit()
+        return self._db
+
+    def _store(self, key: Tuple[str, str], embedding: np.ndarray):
+        """Insert into the memory tier, evicting LRU entries past the ceiling. Caller holds the lock."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        if embedding.nbytes > self.max_bytes:
+            return
+        
+        self._entries[key] = embedding
+        self._bytes += embedding.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _load_from_disk(self, namespace: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Fetch any of the given texts from the disk tier. Caller holds the lock."""
+        db = self._connect()
+        if db is None or not texts:
+            return {}
+        
+        found = {}
+        for i in range(0, len(texts), 500):
+            chunk = texts[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = db.execute(
+                f"SELECT text, vector FROM embeddings WHERE namespace = ? AND text IN ({placeholders})",
+                [namespace] + chunk
+            )
+            for text, blob in rows:
+                found[text] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _save_to_disk(self, namespace: str, items: Dict[str, np.ndarray]):
+        """Persist newly encoded texts to the disk tier. Caller holds the lock."""
+        db = self._connect()
+        if db is None or not items:
+            return
+        
+        db.executemany(
+            "INSERT OR REPLACE INTO embeddings (namespace, text, vector) VALUES (?, ?, ?)",
+            [
+                (namespace, text, np.asarray(embedding, dtype=np.float32).tobytes())
+                for text, embedding in items.items()
+            ]
+        )
+        db.commit()
+
+    def get_or_encode(
+        self,
+        texts: List[str],
+        encode: Callable[[List[str]], np.ndarray],
+        namespace: str = ""
+    ) -> np.ndarray:
+        """
+        Return embeddings for texts, encoding only the ones not already cached.
+        
+        Args:
+            texts: Texts to embed
+            encode: Function that encodes a list of texts into a 2-D array
+            namespace: Cache namespace, normally the model name
+            
+        Returns:
+            Array of embeddings, one row per input text
+        """
+        keys = [self.normalize_text(text) for text in texts]
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        resolved: Dict[str, np.ndarray] = {}
+        
+        with self._lock:
+            for key in keys:
+                if key in resolved:
+                    continue
+                embedding = self._entries.get((namespace, key))
+                if embedding is not None:
+                    self._entries.move_to_end((namespace, key))
+                    resolved[key] = embedding
+            
+            unique_keys = list(dict.fromkeys(keys))
+            pending = [key for key in unique_keys if key not in resolved]
+            from_disk = self._load_from_disk(namespace, pending)
+            for key, embedding in from_disk.items():
+                embedding.setflags(write=False)
+                self._store((namespace, key), embedding)
+                resolved[key] = embedding
+            
+            self.hits += len(unique_keys) - len(pending)
+            self.disk_hits += len(from_disk)
+            missing = [key for key in pending if key not in from_disk]
+            self.misses += len(missing)
+        
+        if missing:
+            # Encode outside the lock so concurrent searches are not serialized on the model
+            encoded = np.asarray(encode(missing), dtype=np.float32)
+            # Copy each row so cached entries do not keep the whole batch buffer alive
+            new_items = {key: encoded[i].copy() for i, key in enumerate(missing)}
+            with self._lock:
+                for key, embedding in new_items.items():
+                    embedding.setflags(write=False)
+                    self._store((namespace, key), embedding)
+                self._save_to_disk(namespace, new_items)
+            resolved.update(new_items)
+        
+        return np.stack([resolved[key] for key in keys])
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss/eviction counters and current memory usage"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_enabled": bool(self.disk_path)
+            }
+
+    def clear(self):
+        """Drop all in-memory entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+# Create singleton instance
+_cache = EmbeddingCache()
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache"""
+    return _cache
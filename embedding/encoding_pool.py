@@ -0,0 +1,105 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+def _init_worker(model_name: str, threads: int, backend: Optional[str]):
+    """Load the model in a worker process and pin its intra-op thread count (torch and ONNX Runtime)"""
+    global _worker_model
+    import torch
+    from embedding.models import load_embedding_model
+
+    torch.set_num_threads(threads)
+    _worker_model = load_embedding_model(model_name, backend, device='cpu', threads=threads)
+
+def _encode_chunk(texts: List[str], batch_size: int) -> np.ndarray:
+    """Encode one chunk of texts with this worker's model"""
+    return np.asarray(_worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False), dtype=np.float32)
+
+def _dimension() -> int:
+    return _worker_model.get_sentence_embedding_dimension()
+
+class EncodingPool:
+    """
+    Pool of worker processes, each with its own copy of a sentence transformer.
+
+    Exposes the encode / get_sentence_embedding_dimension subset of the
+    SentenceTransformer interface, so it can stand in for a model in bulk
+    encoding. Texts are split into contiguous chunks that are encoded in
+    parallel and concatenated back in input order.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        backend: Optional[str] = None
+    ):
+        """
+        Args:
+            model_name: Sentence transformer to load in every worker
+            workers: Number of worker processes
+            threads_per_worker: Torch threads per worker; defaults to an even split of the cores
+            chunk_size: Maximum texts sent to a worker at a time
+            backend: Inference backend for the workers; defaults to EMBEDDING_BACKEND
+        """
+        self.workers = workers or int(os.getenv("EMBEDDING_WORKERS", os.cpu_count() or 1))
+        self.threads_per_worker = threads_per_worker or int(
+            os.getenv("EMBEDDING_THREADS_PER_WORKER") or max(1, (os.cpu_count() or 1) // self.workers)
+        )
+        self.chunk_size = chunk_size or int(os.getenv("EMBEDDING_POOL_CHUNK_SIZE", 1024))
+
+        # Spawn rather than fork: forked children inherit torch's thread pools in a broken state
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, self.threads_per_worker, backend)
+        )
+        self._dimension = None
+        print(f"Started encoding pool: {self.workers} workers x {self.threads_per_worker} threads")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = self._executor.submit(_dimension).result()
+        return self._dimension
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encode texts across the worker processes.
+
+        Args:
+            texts: Texts to encode
+            batch_size: Model batch size inside each worker
+            show_progress_bar: Accepted for interface compatibility; ignored
+
+        Returns:
+            Array of embeddings, one row per input text, in input order
+        """
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # Enough chunks to keep every worker busy, each a whole number of batches
+        chunk_size = min(self.chunk_size, math.ceil(len(texts) / self.workers))
+        chunk_size = max(batch_size, math.ceil(chunk_size / batch_size) * batch_size)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+        # map yields results in submission order
+        return np.concatenate(list(self._executor.map(_encode_chunk, chunks, [batch_size] * len(chunks))))
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self) -> "EncodingPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
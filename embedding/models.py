@@ -0,0 +1,84 @@
+import os
+from typing import Optional
+
+from sentence_transformers import SentenceTransformer
+
+# Inference backends selectable with EMBEDDING_BACKEND:
+#   torch     - stock PyTorch sentence-transformers (reference)
+#   onnx      - exported ONNX graph run by ONNX Runtime
+#   onnx-int8 - the ONNX graph with dynamically quantized int8 weights
+# The ONNX backends need the optional optimum[onnxruntime] package.
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+
+def get_backend(backend: Optional[str] = None) -> str:
+    """Resolve the configured embedding backend"""
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    return backend
+
+def cache_namespace(model_name: str, backend: Optional[str] = None) -> str:
+    """Embedding cache namespace; backends produce slightly different vectors, so they never share entries"""
+    backend = get_backend(backend)
+    return model_name if backend == 'torch' else f"{model_name}:{backend}"
+
+def _quantized_model_dir(model_name: str) -> str:
+    """Local directory holding the int8 export of a model"""
+    export_root = os.getenv("EMBEDDING_ONNX_EXPORT_DIR", "./data/models")
+    return os.path.join(export_root, model_name.replace('/', '__') + '-onnx-int8')
+
+def _onnx_model_kwargs(threads: Optional[int]) -> dict:
+    """ONNX Runtime session settings; without a thread count ORT sizes its pool to every core"""
+    if not threads:
+        return {}
+    import onnxruntime as ort
+
+    session_options = ort.SessionOptions()
+    session_options.intra_op_num_threads = threads
+    session_options.inter_op_num_threads = 1
+    return {"session_options": session_options}
+
+def load_embedding_model(
+    model_name: str,
+    backend: Optional[str] = None,
+    device: Optional[str] = None,
+    threads: Optional[int] = None
+) -> SentenceTransformer:
+    """
+    Load a sentence transformer with the configured inference backend.
+
+    For 'onnx-int8' the model is exported to ONNX and quantized on first
+    use (EMBEDDING_QUANTIZATION_CONFIG picks the target instruction set:
+    avx2, avx512, avx512_vnni or arm64), then loaded from the local export.
+
+    Args:
+        model_name: Hugging Face model name
+        backend: 'torch', 'onnx' or 'onnx-int8'; defaults to EMBEDDING_BACKEND
+        device: Optional torch device for the torch backend
+        threads: Optional intra-op thread count for the ONNX Runtime session
+
+    Returns:
+        A SentenceTransformer whose encode() runs on the chosen backend
+    """
+    backend = get_backend(backend)
+    if backend == 'torch':
+        return SentenceTransformer(model_name, device=device)
+    if backend == 'onnx':
+        return SentenceTransformer(model_name, backend='onnx', model_kwargs=_onnx_model_kwargs(threads))
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    config = os.getenv("EMBEDDING_QUANTIZATION_CONFIG", "avx2")
+    file_name = f"model_qint8_{config}.onnx"
+    export_dir = _quantized_model_dir(model_name)
+    quantized_path = os.path.join(export_dir, 'onnx', file_name)
+
+    if not os.path.exists(quantized_path):
+        print(f"Exporting {model_name} to int8 ONNX ({config}) in {export_dir}...")
+        model = SentenceTransformer(model_name, backend='onnx')
+        model.save_pretrained(export_dir)
+        export_dynamic_quantized_onnx_model(model, config, export_dir)
+
+    return SentenceTransformer(
+        export_dir, backend='onnx', model_kwargs={"file_name": f"onnx/{file_name}", **_onnx_model_kwargs(threads)}
+    )
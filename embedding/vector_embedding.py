@@ -1,47 +1,219 @@
+import json
 import os
+import time
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 from sentence_transformers import SentenceTransformer
-import pickle
+from typing import Any, Dict, Optional, Tuple
 
-# Load your cleaned data
-df = pd.read_csv('data/jobs_sample.csv')
-
-# Initialize the sentence transformer model
-# This is a good general-purpose model for semantic search
-model = SentenceTransformer('TechWolf/JobBERT-v2')
-
-# Create individual embeddings
-print("Creating embeddings...")
-
-title_emb = model.encode(df['title_normalized'].tolist(), 
-                         show_progress_bar=True, batch_size=32)
-location_emb = model.encode(df['location_normalized'].tolist(), 
-                            show_progress_bar=True, batch_size=32)
-skills_emb = model.encode(df['combined_skills'].tolist(), 
-                          show_progress_bar=True, batch_size=32)
+from embedding.cache import EmbeddingCache, get_embedding_cache
+from embedding.encoding_pool import EncodingPool
+from embedding.models import load_embedding_model, get_backend, cache_namespace
+from preprocess.artifacts import JOBS_PATH, EMBEDDINGS_PATH
 
+MODEL_NAME = 'TechWolf/JobBERT-v2'
 
 # Define weights
 TITLE_WEIGHT = 0.2
 LOCATION_WEIGHT = 0.7
 SKILLS_WEIGHT = 0.1
 
-# Compute weighted sum
-embeddings = TITLE_WEIGHT * title_emb + LOCATION_WEIGHT * location_emb + SKILLS_WEIGHT * skills_emb
+FIELD_WEIGHTS = {
+    'title_normalized': TITLE_WEIGHT,
+    'location_normalized': LOCATION_WEIGHT,
+    'combined_skills': SKILLS_WEIGHT
+}
+
+def encode_unique(
+    model: SentenceTransformer,
+    values: pd.Series,
+    batch_size: int = 32,
+    cache: Optional[EmbeddingCache] = None
+) -> Tuple[np.ndarray, int]:
+    """
+    Encode a column, running the model once per distinct string.
+
+    Args:
+        model: Sentence transformer to encode with
+        values: Strings to encode
+        batch_size: Model batch size
+        cache: Optional embedding cache, so strings seen in earlier shards are not re-encoded
+
+    Returns:
+        (embedding for each row, number of strings the model actually encoded)
+    """
+    codes, uniques = pd.factorize(values.fillna(""))
+    encoded = 0
+
+    def encode(texts):
+        nonlocal encoded
+        encoded += len(texts)
+        return model.encode(texts, show_progress_bar=False, batch_size=batch_size)
+
+    if cache is None:
+        unique_embeddings = encode(uniques.tolist())
+    else:
+        unique_embeddings = cache.get_or_encode(uniques.tolist(), encode, namespace=cache_namespace(MODEL_NAME))
+    # Scatter the distinct embeddings back to their rows
+    return unique_embeddings[codes], encoded
+
+def _input_signature(jobs_path: str, rows: int, shard_size: int) -> Dict[str, Any]:
+    """What a checkpoint must match to be resumed"""
+    stat = os.stat(jobs_path)
+    return {
+        "jobs_path": os.path.abspath(jobs_path),
+        "jobs_size": stat.st_size,
+        "jobs_mtime": stat.st_mtime,
+        "rows": rows,
+        "shard_size": shard_size,
+        "model": MODEL_NAME,
+        "backend": get_backend(),
+        "weights": FIELD_WEIGHTS
+    }
+
+def _write_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    """Write the checkpoint atomically"""
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(path + '.tmp', path)
+
+def embed_postings(
+    jobs_path: Optional[str] = None,
+    output_path: Optional[str] = None,
+    shard_size: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    model: Optional[SentenceTransformer] = None,
+    workers: Optional[int] = None
+) -> int:
+    """
+    Embed the cleaned postings shard by shard into an on-disk matrix.
+
+    Postings are streamed from Parquet shard_size rows at a time and each
+    shard's embeddings are written straight into a memory-mapped .npy file,
+    so memory stays bounded by the shard size. After every shard the file is
+    flushed and a checkpoint records how many rows are done; a rerun with the
+    same input resumes after the last completed shard. The matrix is moved to
+    output_path only once every shard is written.
+
+    Args:
+        jobs_path: Cleaned postings Parquet file; defaults to JOBS_PATH
+        output_path: Embedding matrix to write; defaults to EMBEDDINGS_PATH
+        shard_size: Rows per shard
+        batch_size: Model batch size
+        model: Sentence transformer to use; loaded on demand if omitted
+        workers: Encoding processes used when model is omitted; more than one
+            starts an EncodingPool with a model copy per process
+
+    Returns:
+        Number of rows embedded
+    """
+    jobs_path = jobs_path or JOBS_PATH
+    output_path = output_path or EMBEDDINGS_PATH
+    shard_size = shard_size or int(os.getenv("EMBEDDING_SHARD_SIZE", 10000))
+    batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+
+    partial_path = output_path[:-len('.npy')] + '.partial.npy' if output_path.endswith('.npy') else output_path + '.partial.npy'
+    checkpoint_path = output_path + '.checkpoint.json'
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    postings = pq.ParquetFile(jobs_path, memory_map=True)
+
+    # Initialize the sentence transformer model, or a pool of them
+    # This is a good general-purpose model for semantic search
+    pool = None
+    if model is None:
+        workers = workers or int(os.getenv("EMBEDDING_WORKERS", 1))
+        if workers > 1:
+            model = pool = EncodingPool(MODEL_NAME, workers=workers)
+        else:
+            model = load_embedding_model(MODEL_NAME)
+    try:
+        return _embed_shards(postings, model, jobs_path, output_path, partial_path, checkpoint_path, shard_size, batch_size)
+    finally:
+        if pool is not None:
+            pool.close()
+
+def _embed_shards(
+    postings: pq.ParquetFile,
+    model: SentenceTransformer,
+    jobs_path: str,
+    output_path: str,
+    partial_path: str,
+    checkpoint_path: str,
+    shard_size: int,
+    batch_size: int
+) -> int:
+    """Encode the postings into the memory-mapped matrix, resuming from any checkpoint"""
+    total_rows = postings.metadata.num_rows
+    signature = _input_signature(jobs_path, total_rows, shard_size)
+    dimension = model.get_sentence_embedding_dimension()
+
+    checkpoint = None
+    if os.path.exists(checkpoint_path) and os.path.exists(partial_path):
+        with open(checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("signature") != signature:
+            print("Input or settings changed since the last checkpoint; starting over")
+            checkpoint = None
+
+    if checkpoint:
+        rows_done = checkpoint["rows_done"]
+        embeddings = np.lib.format.open_memmap(partial_path, mode='r+')
+        print(f"Resuming after {rows_done} of {total_rows} rows")
+    else:
+        rows_done = 0
+        embeddings = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.float32, shape=(total_rows, dimension))
+
+    cache = get_embedding_cache()
+    encoded = {field: 0 for field in FIELD_WEIGHTS}
+    resumed_at = rows_done
+    started = time.time()
+    start = 0
+
+    # Create individual embeddings, encoding each distinct value once
+    print(f"Creating embeddings for {total_rows} postings in shards of {shard_size}...")
+    for batch in postings.iter_batches(batch_size=shard_size, columns=list(FIELD_WEIGHTS)):
+        end = start + batch.num_rows
+        if end <= rows_done:
+            start = end
+            continue
+        shard = batch.to_pandas().iloc[max(rows_done - start, 0):]
+
+        # Compute weighted sum
+        combined = np.zeros((len(shard), dimension), dtype=np.float32)
+        for field, weight in FIELD_WEIGHTS.items():
+            field_embeddings, field_encoded = encode_unique(model, shard[field], batch_size=batch_size, cache=cache)
+            combined += weight * field_embeddings
+            encoded[field] += field_encoded
+
+        # Persist the shard before recording it as done
+        embeddings[end - len(shard):end] = combined
+        embeddings.flush()
+        rows_done = end
+        _write_checkpoint(checkpoint_path, {"signature": signature, "rows_done": rows_done})
 
-# Save the embeddings to a file for later use
-os.makedirs('data/tmp', exist_ok=True)
-with open('data/tmp/job_embeddings.pkl', 'wb') as f:
-    pickle.dump(embeddings, f)
+        rate = (rows_done - resumed_at) / max(time.time() - started, 1e-9)
+        print(f"Embedded {rows_done}/{total_rows} postings ({rate:.0f} rows/s)")
+        start = end
 
-print(f"Created and saved {len(embeddings)} embeddings with dimension {embeddings.shape[1]}")
+    del embeddings
+    os.replace(partial_path, output_path)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
 
-# You can also add the embeddings to your dataframe if needed
-# This converts the numpy arrays to lists for easier storage in a CSV
-df['embedding'] = embeddings.tolist()
+    rows_this_run = total_rows - resumed_at
+    for field, count in encoded.items():
+        print(f"{field}: model encoded {count} strings for {rows_this_run} rows "
+              f"(dedup ratio {rows_this_run / max(count, 1):.1f}x)")
+    print(f"Created and saved {total_rows} embeddings with dimension {dimension} to {output_path}")
+    return total_rows
 
-# Optional: Save the updated dataframe
-df.to_pickle('data/tmp/linkedin_jobs_with_embeddings.pkl')
+def main():
+    embed_postings()
+    print("Process completed!")
 
-print("Process completed!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,29 @@
 Normalizers module for standardizing job data.
 """
 
-from .location_normalizer import normalize as normalize_location
-from .title_normalizer import normalize as normalize_title
-from .skills_normalizer import normalize as normalize_skill, get_related_skills
+from .location_normalizer import (
+    normalize as normalize_location,
+    coordinates as location_coordinates,
+    state as location_state,
+    is_state as is_state_location,
+    normalize_series as normalize_location_series,
+    coordinates_series as location_coordinates_series,
+    cache_info as _location_cache_info
+)
+from .title_normalizer import normalize as normalize_title, normalize_series as normalize_title_series, cache_info as _title_cache_info
+from .skills_normalizer import normalize as normalize_skill, get_related_skills, cache_info as _skill_cache_info
+from .bulk import map_unique
 
-__all__ = ['normalize_location', 'normalize_title', 'normalize_skill', 'get_related_skills'] 
\ No newline at end of file
+def normalizer_cache_stats():
+    """Memoization statistics for every normalizer"""
+    return {
+        "location": _location_cache_info(),
+        "title": _title_cache_info(),
+        "skill": _skill_cache_info()
+    }
+
+__all__ = [
+    'normalize_location', 'location_coordinates', 'location_state', 'is_state_location', 'normalize_title', 'normalize_skill', 'get_related_skills',
+    'normalize_location_series', 'location_coordinates_series', 'normalize_title_series', 'map_unique',
+    'normalizer_cache_stats'
+] 
\ No newline at end of file
@@ -0,0 +1,43 @@
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+# Entries kept per memoized normalizer function
+NORMALIZER_CACHE_SIZE = int(os.getenv("NORMALIZER_CACHE_SIZE", 100000))
+
+def memoize(func: Callable) -> Callable:
+    """Bounded LRU memoization for a pure normalizer function or bound method"""
+    return lru_cache(maxsize=NORMALIZER_CACHE_SIZE)(func)
+
+def cache_stats(func: Callable) -> Dict[str, Any]:
+    """Hit/miss counters of a function wrapped with memoize"""
+    info = func.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / lookups if lookups else 0.0
+    }
+
+def map_unique(values: pd.Series, func: Callable[[Any], Any]) -> pd.Series:
+    """
+    Apply func once per distinct value of a Series and map the results back.
+    
+    Args:
+        values: Series to transform; missing values count as one distinct value
+        func: Function applied to each distinct value
+    
+    Returns:
+        Series of results aligned with values' index
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    # Fill element by element so tuple results are not broadcast into extra dimensions
+    results = np.empty(len(uniques), dtype=object)
+    for i, value in enumerate(uniques):
+        results[i] = func(value)
+    return pd.Series(results[codes], index=values.index, name=values.name)
@@ -1,5 +1,153 @@
+import csv
+import os
 import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+import pandas as pd
 from geopy.geocoders import Nominatim
+from geopy.extra.rate_limiter import RateLimiter
+
+from .bulk import memoize, cache_stats, map_unique
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'us_gazetteer.csv')
+
+class GazetteerEntry(NamedTuple):
+    name: str
+    kind: str  # 'city', 'state' or 'metro'
+    state: str  # Two-letter state code
+    metro: str
+    latitude: float
+    longitude: float
+
+class Gazetteer:
+    """
+    In-memory index over a local file of US cities, states and metro areas.
+    
+    The file is a CSV with columns name, kind, state, metro, latitude,
+    longitude and aliases ('|'-separated). Point LOCATION_GAZETTEER_PATH at a
+    larger file to extend coverage without code changes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("LOCATION_GAZETTEER_PATH") or DEFAULT_GAZETTEER_PATH
+        self._by_name: Dict[str, GazetteerEntry] = {}
+        self._by_city_state: Dict[Tuple[str, str], GazetteerEntry] = {}
+        self._aliases: Dict[str, str] = {}
+        self._load()
+
+    def _load(self):
+        """Load the gazetteer file into the lookup tables"""
+        if not os.path.exists(self.path):
+            print(f"Gazetteer file not found at {self.path}; offline location lookup disabled")
+            return
+        
+        with open(self.path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                entry = GazetteerEntry(
+                    name=row['name'].strip().lower(),
+                    kind=row['kind'].strip().lower(),
+                    state=row['state'].strip().upper(),
+                    metro=row['metro'].strip().lower(),
+                    latitude=float(row['latitude']),
+                    longitude=float(row['longitude'])
+                )
+                # First entry wins for ambiguous names, so order the file by prominence
+                self._by_name.setdefault(entry.name, entry)
+                if entry.kind == 'city':
+                    self._by_city_state.setdefault((entry.name, entry.state), entry)
+                for alias in (row.get('aliases') or '').split('|'):
+                    alias = alias.strip().lower()
+                    if alias:
+                        self._aliases.setdefault(alias, entry.name)
+
+    def canonical(self, name: str) -> str:
+        """Resolve an alias (e.g. 'nyc', 'philly') to its canonical name"""
+        return self._aliases.get(name, name)
+
+    def lookup(self, name: str, state: Optional[str] = None) -> Optional[GazetteerEntry]:
+        """
+        Find a place by name, optionally restricted to a two-letter state code.
+        """
+        name = self.canonical(name)
+        if state:
+            return self._by_city_state.get((name, state.upper()))
+        return self._by_name.get(name)
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+class GeocodeCache:
+    """
+    Persistent, bounded SQLite cache of external geocoder results.
+    
+    Negative results are cached too so unresolvable strings are not sent to
+    the geocoder again. Once max_entries is exceeded the oldest entries are
+    evicted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = path or os.getenv("GEOCODE_CACHE_PATH", "./data/cache/geocode_cache.db")
+        self.max_entries = max_entries or int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", 100000))
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self, create: bool = True) -> Optional[sqlite3.Connection]:
+        """Open the cache file on first use; with create=False a missing file is left uncreated"""
+        if self._db is None:
+            if not create and not os.path.exists(self.path):
+                return None
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocodes ("
+                "query TEXT PRIMARY KEY, name TEXT, latitude REAL, longitude REAL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS geocodes_created_at ON geocodes (created_at)")
+            self._db.commit()
+        return self._db
+
+    def get(self, query: str) -> Optional[Tuple[Optional[str], Optional[float], Optional[float]]]:
+        """
+        Returns:
+            (name, latitude, longitude) if the query is cached, where name is None
+            for a cached negative result; None if the query has never been geocoded
+        """
+        with self._lock:
+            db = self._connect(create=False)
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT name, latitude, longitude FROM geocodes WHERE query = ?", (query,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def put(
+        self,
+        query: str,
+        name: Optional[str],
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None
+    ):
+        """Store a geocoder result, evicting the oldest entries past max_entries"""
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO geocodes (query, name, latitude, longitude, created_at) VALUES (?, ?, ?, ?, ?)",
+                (query, name, latitude, longitude, time.time())
+            )
+            (count,) = db.execute("SELECT COUNT(*) FROM geocodes").fetchone()
+            if count > self.max_entries:
+                db.execute(
+                    "DELETE FROM geocodes WHERE query IN "
+                    "(SELECT query FROM geocodes ORDER BY created_at LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            db.commit()
 
 class LocationNormalizer:
     def __init__(self):
@@ -41,34 +189,184 @@ class LocationNormalizer:
 
         # Reverse mapping for metro areas
         self.city_to_metro = {}
-        self.geolocator = Nominatim(user_agent="job_search_app")
         for metro, cities in self.metro_areas.items():
             for city in cities:
                 self.city_to_metro[city] = metro
+        
+        # Reverse mapping for state names
+        self.state_codes = {name.lower(): code for code, name in self.state_mapping.items()}
+        
+        # Offline gazetteer used before falling back to the external geocoder
+        self.gazetteer = Gazetteer()
+        
+        # External geocoder, only ever called from a background worker
+        self.geolocator = Nominatim(user_agent="job_search_app")
+        self._rate_limited_geocode = RateLimiter(
+            self.geolocator.geocode, min_delay_seconds=1, max_retries=0, swallow_exceptions=False
+        )
+        self.geocode_cache = GeocodeCache()
+        self.background_geocoding = os.getenv("LOCATION_BACKGROUND_GEOCODING", "true").lower() == "true"
+        self.max_pending_geocodes = int(os.getenv("LOCATION_MAX_PENDING_GEOCODES", 1000))
+        self._pending_geocodes = set()
+        self._geocode_executor = None
+        self._geocode_lock = threading.Lock()
+        
+        # Offline resolution is pure and locations repeat heavily, so memoize it.
+        # Geocode cache lookups stay outside the memo since that cache keeps filling.
+        self._normalize_offline = memoize(self._normalize_offline)
+        self._gazetteer_entry = memoize(self._gazetteer_entry)
 
     def normalize(self, location: str, enable_geolocator: bool = False) -> str:
         """
         Normalize location string to a standard format.
         Returns the most specific valid location identifier.
+        
+        With enable_geolocator, strings the offline rules and gazetteer cannot
+        resolve are looked up in the geocode cache. Cache misses never block:
+        they are queued for background geocoding and the offline result is
+        returned, so a later request for the same string benefits.
         """
         if not location or location.lower() == 'not specified':
             return 'united states'
             
         # Convert to lowercase for processing
         location = location.lower().strip()
+        
+        normalized, resolved = self._normalize_offline(location)
+        if resolved or not enable_geolocator:
+            return normalized
+        
+        geocoded_name = self._cached_geocode(location)
+        if geocoded_name:
+            return self._normalize_offline(geocoded_name)[0]
+        return normalized
 
-        if enable_geolocator:
-            if 'united states' not in location:
-                location = location + ', united states'
+    def coordinates(self, normalized_location: str) -> Optional[Tuple[float, float]]:
+        """
+        Resolve a normalized location (output of normalize) to (latitude, longitude).
+        
+        Uses the gazetteer and any cached geocoder result; never calls the
+        external geocoder. Returns None for 'united states' and unknown places.
+        """
+        if not normalized_location or normalized_location == 'united states':
+            return None
+        
+        entry, geocodable = self._gazetteer_entry(normalized_location)
+        if entry is not None:
+            return entry.latitude, entry.longitude
+        
+        if geocodable:
+            cached = self.geocode_cache.get(normalized_location)
+            if cached is not None and cached[0] is not None:
+                return cached[1], cached[2]
+        return None
+
+    def is_state(self, normalized_location: Optional[str]) -> bool:
+        """Whether a normalized location is a whole state rather than a place in one"""
+        return normalized_location in self.state_codes
+
+    def state(self, normalized_location: Optional[str]) -> Optional[str]:
+        """
+        Two-letter code of the state a normalized location lies in.
+        
+        Returns None for 'united states' and places that cannot be resolved.
+        """
+        if not normalized_location or normalized_location == 'united states':
+            return None
+        if normalized_location in self.state_codes:
+            return self.state_codes[normalized_location]
+        if ', ' in normalized_location:
+            region = normalized_location.rsplit(', ', 1)[1]
+            if region in self.state_codes:
+                return self.state_codes[region]
+        entry, _ = self._gazetteer_entry(normalized_location)
+        return entry.state if entry is not None else None
 
-            try:
-                location = self.geolocator.geocode(location).raw['name'].lower().strip()
-            except Exception as e:
-                pass
+    def _gazetteer_entry(self, normalized_location: str) -> Tuple[Optional[GazetteerEntry], bool]:
+        """
+        Look up a normalized location in the gazetteer.
+        
+        Returns:
+            (gazetteer entry or None, whether an unresolved 'city, united states'
+            may have coordinates in the geocode cache)
+        """
+        entry = self.gazetteer.lookup(normalized_location)
+        if entry is None and ', ' in normalized_location:
+            city, region = normalized_location.rsplit(', ', 1)
+            if region in self.state_codes:
+                entry = self.gazetteer.lookup(city, self.state_codes[region])
+            elif region == 'united states':
+                entry = self.gazetteer.lookup(city)
+                return entry, entry is None
+        return entry, False
+
+    def normalize_series(self, locations: pd.Series) -> pd.Series:
+        """Normalize a Series of locations offline, computing each distinct location once"""
+        return map_unique(locations, self.normalize)
+
+    def coordinates_series(self, normalized_locations: pd.Series) -> pd.Series:
+        """Coordinates for a Series of normalized locations, resolving each distinct location once"""
+        return map_unique(normalized_locations, self.coordinates)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Memoization statistics for offline normalization and gazetteer lookups"""
+        return {
+            "normalize": cache_stats(self._normalize_offline),
+            "coordinates": cache_stats(self._gazetteer_entry)
+        }
 
+    def _cached_geocode(self, location: str) -> Optional[str]:
+        """
+        Return the geocoder's place name for location if it is cached,
+        otherwise schedule a background lookup and return None.
+        """
+        query = location if 'united states' in location else location + ', united states'
+        
+        cached = self.geocode_cache.get(query)
+        if cached is not None:
+            name = cached[0]
+            return name.lower().strip() if name else None
+        
+        if self.background_geocoding:
+            self._schedule_geocode(query)
+        return None
+
+    def _schedule_geocode(self, query: str):
+        """Queue a geocoder lookup on the background worker, deduplicating in-flight queries"""
+        with self._geocode_lock:
+            if query in self._pending_geocodes or len(self._pending_geocodes) >= self.max_pending_geocodes:
+                return
+            self._pending_geocodes.add(query)
+            if self._geocode_executor is None:
+                # A single worker keeps us within Nominatim's one-request-per-second policy
+                self._geocode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geocoder")
+        self._geocode_executor.submit(self._geocode_and_cache, query)
+
+    def _geocode_and_cache(self, query: str):
+        """Geocode a query and store the result (or the lack of one) in the cache"""
+        try:
+            result = self._rate_limited_geocode(query)
+            if result is None:
+                self.geocode_cache.put(query, None)
+            else:
+                self.geocode_cache.put(query, result.raw['name'], result.latitude, result.longitude)
+        except Exception as e:
+            # Not cached, so the lookup is retried on a later request
+            print(f"Error geocoding '{query}': {e}")
+        finally:
+            with self._geocode_lock:
+                self._pending_geocodes.discard(query)
+
+    def _normalize_offline(self, location: str) -> Tuple[str, bool]:
+        """
+        Normalize a lowercased location using only local rules and the gazetteer.
+        
+        Returns:
+            (normalized location, whether it was resolved to a known place)
+        """
         # Handle "United States" variations
         if location in {'united states', 'us', 'usa', 'u.s.', 'u.s.a.'}:
-            return 'united states'
+            return 'united states', True
             
         # Remove common prefixes
         location = re.sub(r'^greater\s+|^the\s+', '', location)
@@ -78,16 +376,19 @@ class LocationNormalizer:
         parts = [p for p in parts if p and p not in {'united states', 'us', 'usa', 'area', 'region', 'metropolitan', 'metro', 'metroplex'}]
         
         if not parts:
-            return 'united states'
+            return 'united states', True
+        
+        # Resolve aliases such as 'nyc' or 'philly'
+        parts = [self.gazetteer.canonical(p) for p in parts]
             
         # Check for metro areas
         for part in parts:
             # Direct metro area match
             if part in self.metro_areas:
-                return part
+                return part, True
             # City in metro area match
             if part in self.city_to_metro:
-                return self.city_to_metro[part]
+                return self.city_to_metro[part], True
         
         # Handle state abbreviations
         for part in parts:
@@ -96,22 +397,33 @@ class LocationNormalizer:
                 # If we have a city, return "city, state"
                 if len(parts) > 1:
                     city = parts[0].strip()
-                    return f"{city}, {self.state_mapping[part].lower()}"
-                return self.state_mapping[part].lower()
+                    return f"{city}, {self.state_mapping[part].lower()}", True
+                return self.state_mapping[part].lower(), True
         
         # Handle full state names
         for part in parts:
             for state_name in self.state_mapping.values():
                 if part == state_name.lower():
-                    return state_name.lower()
+                    return state_name.lower(), True
+        
+        # Known city without a state, e.g. 'austin'
+        entry = self.gazetteer.lookup(parts[0])
+        if entry and entry.kind == 'city':
+            return f"{parts[0]}, {self.state_mapping[entry.state].lower()}", True
         
         # If we have multiple parts but couldn't match a state, assume first part is city
         if len(parts) > 1:
-            return f"{parts[0]}, united states"
+            return f"{parts[0]}, united states", False
             
         # Default to the original location with United States
-        return f"{parts[0]}, united states"
+        return f"{parts[0]}, united states", False
 
 # Create singleton instance
 _normalizer = LocationNormalizer()
-normalize = _normalizer.normalize 
\ No newline at end of file
+normalize = _normalizer.normalize
+coordinates = _normalizer.coordinates
+state = _normalizer.state
+is_state = _normalizer.is_state
+normalize_series = _normalizer.normalize_series
+coordinates_series = _normalizer.coordinates_series
+cache_info = _normalizer.cache_stats 
\ No newline at end of file
@@ -1,5 +1,7 @@
 import re
-from typing import List, Set, Dict
+from typing import Any, List, Set, Dict, Optional
+
+from .bulk import memoize, cache_stats
 
 class SkillsNormalizer:
     def __init__(self):
@@ -40,6 +42,25 @@ class SkillsNormalizer:
             'ai': {'machine learning', 'artificial intelligence', 'natural language processing', 'computer vision'},
             'devops': {'kubernetes', 'docker', 'continuous integration and deployment', 'development operations'}
         }
+        
+        # The same skills recur across postings and candidates, so memoize per skill
+        self._normalize_skill = memoize(self._normalize_skill)
+
+    def _normalize_skill(self, skill: str) -> Optional[str]:
+        """
+        Normalize a single skill, returning None if nothing is left of it.
+        """
+        # Convert to lowercase and strip
+        skill = skill.lower().strip()
+        
+        # Remove special characters except dots for things like node.js
+        skill = re.sub(r'[^\w\s.-]', '', skill)
+        
+        # Check if we have a mapping for this skill
+        if skill in self.skill_mapping:
+            skill = self.skill_mapping[skill]
+        
+        return skill or None
 
     def normalize(self, skills: List[str]) -> List[str]:
         """
@@ -50,16 +71,7 @@ class SkillsNormalizer:
             
         normalized = []
         for skill in skills:
-            # Convert to lowercase and strip
-            skill = skill.lower().strip()
-            
-            # Remove special characters except dots for things like node.js
-            skill = re.sub(r'[^\w\s.-]', '', skill)
-            
-            # Check if we have a mapping for this skill
-            if skill in self.skill_mapping:
-                skill = self.skill_mapping[skill]
-            
+            skill = self._normalize_skill(skill)
             if skill:
                 normalized.append(skill)
         
@@ -87,7 +99,12 @@ class SkillsNormalizer:
         related.discard(skill)
         return related
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Memoization statistics for single-skill normalization"""
+        return cache_stats(self._normalize_skill)
+
 # Create singleton instance
 _normalizer = SkillsNormalizer()
 normalize = _normalizer.normalize
-get_related_skills = _normalizer.get_related_skills 
\ No newline at end of file
+get_related_skills = _normalizer.get_related_skills
+cache_info = _normalizer.cache_stats 
\ No newline at end of file
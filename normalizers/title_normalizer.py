@@ -1,5 +1,55 @@
 import re
-from typing import Set, List, Optional
+from typing import Any, Dict, Set, List, Optional, Tuple
+
+import pandas as pd
+
+from .bulk import memoize, cache_stats, map_unique
+
+class PhraseTrie:
+    """
+    Token trie over multi-word phrases.
+    
+    Finds every phrase starting at a given token in one walk, instead of
+    joining and looking up each candidate word span.
+    """
+    
+    _VALUE = object()  # Key marking the value stored at the end of a phrase
+    
+    def __init__(self, phrases: Dict[str, Any], reverse: bool = False):
+        """
+        Args:
+            phrases: Mapping of whitespace-separated phrases to values
+            reverse: Store phrases back to front, for matching suffixes of reversed token lists
+        """
+        self._root: Dict[Any, Any] = {}
+        for phrase, value in phrases.items():
+            tokens = phrase.split()
+            node = self._root
+            for token in (reversed(tokens) if reverse else tokens):
+                node = node.setdefault(token, {})
+            node[self._VALUE] = value
+    
+    def matches(self, tokens: List[str], start: int = 0) -> List[Tuple[int, Any]]:
+        """
+        Phrases that begin at tokens[start], shortest first.
+        
+        Returns:
+            List of (number of tokens matched, value) pairs
+        """
+        found = []
+        node = self._root
+        for end in range(start, len(tokens)):
+            node = node.get(tokens[end])
+            if node is None:
+                break
+            if self._VALUE in node:
+                found.append((end - start + 1, node[self._VALUE]))
+        return found
+    
+    def get(self, token: str) -> Optional[Any]:
+        """Value of a single-token phrase, or None"""
+        node = self._root.get(token)
+        return node.get(self._VALUE) if node is not None else None
 
 class TitleNormalizer:
     def __init__(self):
@@ -123,27 +173,35 @@ class TitleNormalizer:
             'v': self.LEAD_LEVEL,
             'grade 5': self.LEAD_LEVEL,
         }
+        
+        # Compiled matchers over the tables above
+        self._role_trie = PhraseTrie(self.role_aliases)
+        self._seniority_prefix_trie = PhraseTrie(self.seniority_mapping)
+        self._seniority_suffix_trie = PhraseTrie(self.seniority_mapping, reverse=True)
+        
+        # Titles repeat heavily across postings and candidates, so memoize
+        self.normalize = memoize(self.normalize)
 
     def _normalize_role(self, title: str) -> str:
         """
         Normalize role aliases and abbreviations.
+        
+        Replaces the longest alias in the title (the leftmost one on ties)
+        with its normalized form, found in a single trie scan over the words.
         """
         # Split the title into words
         words = title.lower().split()
         
-        # Try to match multi-word aliases first
-        for i in range(len(words), 0, -1):
-            for j in range(len(words) - i + 1):
-                phrase = ' '.join(words[j:j+i])
-                if phrase in self.role_aliases:
-                    # Replace the matched phrase with its normalized version
-                    words[j:j+i] = self.role_aliases[phrase].split()
-                    return ' '.join(words)
+        best_start, best_length, best_role = 0, 0, None
+        for start in range(len(words)):
+            found = self._role_trie.matches(words, start)
+            if found and found[-1][0] > best_length:
+                best_start = start
+                best_length, best_role = found[-1]
         
-        # Try to match individual words
-        for i, word in enumerate(words):
-            if word in self.role_aliases:
-                words[i] = self.role_aliases[word]
+        if best_role is not None:
+            # Replace the matched phrase with its normalized version
+            words[best_start:best_start + best_length] = best_role.split()
         
         return ' '.join(words)
 
@@ -151,39 +209,33 @@ class TitleNormalizer:
         """
         Extract seniority level from title if it exists.
         Returns (seniority_level, remaining_title)
+        
+        Prefixes are preferred over suffixes and shorter phrases over longer
+        ones; otherwise the first seniority word anywhere in the title is used.
         """
         words = title.split()
         if not words:
             return None, ""
-            
-        # Check for exact matches in first word
-        first_word = words[0].lower()
-        if first_word in self.seniority_mapping:
-            return self.seniority_mapping[first_word], ' '.join(words[1:])
-            
-        # Check for two-word prefixes
-        if len(words) >= 2:
-            first_two = ' '.join(words[:2]).lower()
-            if first_two in self.seniority_mapping:
-                return self.seniority_mapping[first_two], ' '.join(words[2:])
-        
-        # Check for suffixes
-        last_word = words[-1].lower()
-        if last_word in self.seniority_mapping:
-            return self.seniority_mapping[last_word], ' '.join(words[:-1])
-            
-        # Check for two-word suffixes
-        if len(words) >= 2:
-            last_two = ' '.join(words[-2:]).lower()
-            if last_two in self.seniority_mapping:
-                return self.seniority_mapping[last_two], ' '.join(words[:-2])
+        lowered = [word.lower() for word in words]
+        
+        # Check for one- and two-word prefixes
+        found = self._seniority_prefix_trie.matches(lowered)
+        if found:
+            length, seniority = found[0]
+            return seniority, ' '.join(words[length:])
+        
+        # Check for one- and two-word suffixes
+        found = self._seniority_suffix_trie.matches(lowered[::-1])
+        if found:
+            length, seniority = found[0]
+            return seniority, ' '.join(words[:-length])
         
         # Check if any word indicates seniority
-        for word in words:
-            word = word.lower()
-            if word in self.seniority_mapping:
-                remaining_words = [w for w in words if w.lower() != word]
-                return self.seniority_mapping[word], ' '.join(remaining_words)
+        for word in lowered:
+            seniority = self._seniority_prefix_trie.get(word)
+            if seniority is not None:
+                remaining_words = [w for w, l in zip(words, lowered) if l != word]
+                return seniority, ' '.join(remaining_words)
                 
         # Default to mid-level if no seniority indicator is found
         return self.MID_LEVEL, ' '.join(words)
@@ -219,6 +271,16 @@ class TitleNormalizer:
             
         return title.strip()
 
+    def normalize_series(self, titles: pd.Series) -> pd.Series:
+        """Normalize a Series of titles, computing each distinct title once"""
+        return map_unique(titles, self.normalize)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Memoization statistics for normalize"""
+        return cache_stats(self.normalize)
+
 # Create singleton instance
 _normalizer = TitleNormalizer()
-normalize = _normalizer.normalize 
\ No newline at end of file
+normalize = _normalizer.normalize
+normalize_series = _normalizer.normalize_series
+cache_info = _normalizer.cache_stats 
\ No newline at end of file
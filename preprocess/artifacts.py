@@ -0,0 +1,86 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Cleaned postings (Parquet), written by preprocess.clean_data
+JOBS_PATH = os.getenv("JOBS_DATA_PATH", "data/jobs_sample.parquet")
+
+# float32 embedding matrix (.npy) row-aligned with JOBS_PATH, written by embedding.vector_embedding
+EMBEDDINGS_PATH = os.getenv("JOB_EMBEDDINGS_PATH", "data/tmp/job_embeddings.npy")
+
+# Columns that must keep a numeric type even when a chunk has no values for them
+FLOAT_COLUMNS = ['location_latitude', 'location_longitude']
+
+class ParquetChunkWriter:
+    """
+    Appends DataFrame chunks to a Parquet file, one row group per chunk.
+
+    The schema is taken from the first chunk and later chunks are cast to it.
+    Rows go to a temporary file that replaces path only on close(), so readers
+    never see a partial file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.partial_path = path + '.partial'
+        self._writer: Optional[pq.ParquetWriter] = None
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame):
+        """Append one chunk"""
+        df = df.assign(**{c: pd.to_numeric(df[c], errors='coerce').astype('float64') for c in FLOAT_COLUMNS if c in df.columns})
+        if self._writer is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._writer = pq.ParquetWriter(self.partial_path, table.schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self, empty_columns: Optional[List[str]] = None):
+        """
+        Finish the file and move it into place.
+
+        Args:
+            empty_columns: Columns to write if no chunk was written, so the schema is kept
+        """
+        if self._writer is None:
+            self.write(pd.DataFrame({c: pd.Series(dtype='object') for c in empty_columns or []}))
+        self._writer.close()
+        os.replace(self.partial_path, self.path)
+
+def load_jobs(path: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load cleaned postings from Parquet through a memory map.
+
+    Args:
+        path: Parquet file; defaults to JOBS_PATH
+        columns: Only read these columns
+
+    Returns:
+        DataFrame of postings
+    """
+    table = pq.read_table(path or JOBS_PATH, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+def save_embeddings(embeddings: np.ndarray, path: Optional[str] = None):
+    """Write the embedding matrix as float32 .npy, atomically"""
+    path = path or EMBEDDINGS_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # np.save appends .npy to names without it, so keep the suffix on the temp file
+    partial_path = path[:-len('.npy')] + '.partial.npy' if path.endswith('.npy') else path + '.partial.npy'
+    np.save(partial_path, np.ascontiguousarray(embeddings, dtype=np.float32))
+    os.replace(partial_path, path)
+
+def load_embeddings(path: Optional[str] = None) -> np.ndarray:
+    """Memory-map the embedding matrix read-only; rows are paged in on access"""
+    return np.load(path or EMBEDDINGS_PATH, mmap_mode='r')
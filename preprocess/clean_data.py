@@ -1,99 +1,184 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
 import pandas as pd
+from .artifacts import JOBS_PATH, ParquetChunkWriter
 from .utils import extract_skills_efficient, clean_text, is_software_job, normalize_skills, clean_combined_skills
-from normalizers import normalize_location, normalize_title
+from normalizers import normalize_location_series, normalize_title_series, location_coordinates_series, location_state, map_unique
 
-# Read the original data
-df = pd.read_csv('data/raw_data/postings.csv', quoting=1)
+RAW_POSTINGS_PATH = 'data/raw_data/postings.csv'
+OUTPUT_PATH = JOBS_PATH
 
 # Keep only necessary columns
 columns_to_keep = ['job_id', 'company_name', 'title', 'description', 'location', 'remote_allowed', 'job_posting_url', 'skills_desc']
-df = df[columns_to_keep]
-
-# Filter out records with missing company names
-print(f"Original record count: {len(df)}")
-df = df.dropna(subset=['company_name', 'title', 'description'])
-print(f"Record count after filtering: {len(df)}")
-
-# Optional: Filter for software engineering jobs only
-# Uncomment the following lines if you want to focus on software engineering jobs
-# df['is_software'] = df.apply(lambda row: is_software_job(row['title'], row['description']), axis=1)
-# df = df[df['is_software'] == True]
-# print(f"Software engineering jobs count: {len(df)}")
-
-# Handle missing values for other fields
-df['location'] = df['location'].fillna('Not Specified')
-# Normalize locations
-print("Normalizing location data...")
-df['location_normalized'] = df['location'].apply(normalize_location)
-df['remote_allowed'] = df['remote_allowed'].apply(
-    lambda x: bool(x) if not pd.isna(x) else False
-)
-df['job_posting_url'] = df['job_posting_url'].fillna('')
-
-# Clean title
-df['title_clean'] = df['title'].apply(clean_text)
-df['title_normalized'] = df['title_clean'].apply(normalize_title)
-
-# Extract skills from descriptions
-print("Extracting skills from job descriptions...")
-df['extracted_skills'] = extract_skills_efficient(df['description'])
-
-# Combine skills from original data and extraction
-df['skills_desc'] = df['skills_desc'].fillna("").apply(normalize_skills)
-
-df['combined_skills'] = df.apply(
-    lambda row: 
-        (row['skills_desc'] + ", " if row['skills_desc'] else "") + 
-        (", ".join(row['extracted_skills']) if row['extracted_skills'] else ""),
-    axis=1
-)
-
-# Clean up combined skills
-df['combined_skills'] = df['combined_skills'].apply(clean_combined_skills)
-
-# Drop rows with no skills information
-empty_skills = df['combined_skills'] == ""
-print(f"Dropping {empty_skills.sum()} rows with no skills information")
-df = df[~empty_skills]
-print(f"Final record count: {len(df)}")
-
-df['description_clean'] = df['description'].apply(clean_text)
-
-# Create a combined text field for generating embeddings
-df['combined_text'] = (
-    "Title: " + df['title_clean'] + 
-    ", Location: " + df['location'] +
-    ", Skills: " + df['combined_skills']
-)
 
 # Select only the columns you need for your RAG system
 columns_to_keep_final = [
-    'job_id', 
-    'company_name', 
+    'job_id',
+    'company_name',
     'title_clean',  # Clean version of the title
-    'title_normalized', 
+    'title_normalized',
     'location',
-    'location_normalized', 
+    'location_normalized',
+    'location_state',  # Two-letter state code, for state-level location filters
+    'location_latitude',
+    'location_longitude',
     'job_posting_url',
     'remote_allowed',
-    'combined_skills', 
+    'combined_skills',
     'combined_text'  # The text used for embeddings
 ]
 
-# Create a sample with only necessary columns
-df_sample = df[columns_to_keep_final]
-
-# Display a few examples
-print("\nSample records:")
-for i, row in df_sample.head(3).iterrows():
-    print("\n---")
-    print(f"Title: {row['title_clean']}")
-    print(f"Company: {row['company_name']}")
-    print(f"Location: {row['location']}")
-    print(f"Skills: {row['combined_skills']}")
-    print(f"Combined text: {row['combined_text'][:100]}...")  # Show first 100 chars
-
-# Save the sample dataset
-df_sample.to_csv('data/jobs_sample.csv', index=False)
-
-print(f"Saved {len(df_sample)} records to the sample dataset")
\ No newline at end of file
+def clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean one chunk of raw postings.
+
+    Every step only looks at its own row, so chunks can be cleaned
+    independently and concatenated.
+
+    Args:
+        df: Raw postings with at least the columns in columns_to_keep
+
+    Returns:
+        Cleaned postings with the columns in columns_to_keep_final
+    """
+    df = df[columns_to_keep]
+
+    # Filter out records with missing company names
+    df = df.dropna(subset=['company_name', 'title', 'description']).copy()
+
+    # Optional: Filter for software engineering jobs only
+    # Uncomment the following lines if you want to focus on software engineering jobs
+    # df['is_software'] = df.apply(lambda row: is_software_job(row['title'], row['description']), axis=1)
+    # df = df[df['is_software'] == True]
+
+    # Handle missing values for other fields
+    df['location'] = df['location'].fillna('Not Specified')
+    # Normalize locations, once per distinct value
+    df['location_normalized'] = normalize_location_series(df['location'])
+
+    # Resolve coordinates once per distinct location for geo-distance scoring
+    coordinates = location_coordinates_series(df['location_normalized'])
+    df['location_latitude'] = coordinates.apply(lambda c: c[0] if c else None)
+    df['location_longitude'] = coordinates.apply(lambda c: c[1] if c else None)
+    df['location_state'] = map_unique(df['location_normalized'], location_state)
+    df['remote_allowed'] = df['remote_allowed'].apply(
+        lambda x: bool(x) if not pd.isna(x) else False
+    )
+    df['job_posting_url'] = df['job_posting_url'].fillna('')
+
+    # Clean title
+    df['title_clean'] = df['title'].apply(clean_text)
+    df['title_normalized'] = normalize_title_series(df['title_clean'])
+
+    # Extract skills from descriptions
+    df['extracted_skills'] = extract_skills_efficient(df['description'])
+
+    # Combine skills from original data and extraction
+    df['skills_desc'] = df['skills_desc'].fillna("").apply(normalize_skills)
+
+    df['combined_skills'] = [
+        (skills_desc + ", " if skills_desc else "") + (", ".join(extracted) if extracted else "")
+        for skills_desc, extracted in zip(df['skills_desc'], df['extracted_skills'])
+    ]
+
+    # Clean up combined skills
+    df['combined_skills'] = df['combined_skills'].apply(clean_combined_skills)
+
+    # Drop rows with no skills information
+    df = df[df['combined_skills'] != ""]
+
+    # Create a combined text field for generating embeddings
+    df = df.assign(combined_text=(
+        "Title: " + df['title_clean'] +
+        ", Location: " + df['location'] +
+        ", Skills: " + df['combined_skills']
+    ))
+
+    return df[columns_to_keep_final]
+
+def clean_postings(
+    input_path: str = RAW_POSTINGS_PATH,
+    output_path: str = OUTPUT_PATH,
+    chunk_size: Optional[int] = None,
+    workers: Optional[int] = None
+) -> int:
+    """
+    Clean the raw postings CSV chunk by chunk on a process pool.
+
+    Chunks are read lazily, at most 2 * workers are in flight at once, and
+    cleaned chunks are appended to the output in input order, so peak memory
+    is bounded by the chunk size rather than the dataset size. The output is
+    a Parquet file with one row group per chunk, written to a temporary file
+    and moved into place when complete.
+
+    Args:
+        input_path: Raw LinkedIn postings CSV
+        output_path: Where to write the cleaned Parquet file
+        chunk_size: Rows per chunk
+        workers: Number of worker processes (1 cleans in this process)
+
+    Returns:
+        Number of records written
+    """
+    chunk_size = chunk_size or int(os.getenv("CLEAN_DATA_CHUNK_SIZE", 20000))
+    workers = workers or int(os.getenv("CLEAN_DATA_WORKERS", os.cpu_count() or 1))
+
+    writer = ParquetChunkWriter(output_path)
+    rows_read = 0
+    rows_written = 0
+    chunks_written = 0
+    started = time.time()
+
+    def write(cleaned: pd.DataFrame):
+        nonlocal rows_written, chunks_written
+        if chunks_written == 0:
+            # Display a few examples
+            print("\nSample records:")
+            for _, row in cleaned.head(3).iterrows():
+                print("\n---")
+                print(f"Title: {row['title_clean']}")
+                print(f"Company: {row['company_name']}")
+                print(f"Location: {row['location']}")
+                print(f"Skills: {row['combined_skills']}")
+                print(f"Combined text: {row['combined_text'][:100]}...")  # Show first 100 chars
+            print()
+        writer.write(cleaned)
+        rows_written += len(cleaned)
+        chunks_written += 1
+        print(
+            f"Wrote chunk {chunks_written}: {rows_written} records kept, {rows_read} rows read "
+            f"({rows_read / max(time.time() - started, 1e-9):.0f} rows/s)"
+        )
+
+    print(f"Cleaning {input_path} in chunks of {chunk_size} rows with {workers} workers...")
+    chunks = pd.read_csv(input_path, quoting=1, chunksize=chunk_size, usecols=columns_to_keep)
+
+    if workers == 1:
+        for chunk in chunks:
+            rows_read += len(chunk)
+            write(clean_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                rows_read += len(chunk)
+                pending.append(executor.submit(clean_chunk, chunk))
+                # Write finished chunks in order and keep the number in flight bounded
+                while pending and (pending[0].done() or len(pending) >= 2 * workers):
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    # Keep the output schema even when nothing survives cleaning
+    writer.close(empty_columns=columns_to_keep_final)
+
+    print(f"Original record count: {rows_read}")
+    print(f"Saved {rows_written} records to {output_path} in {time.time() - started:.1f}s")
+    return rows_written
+
+if __name__ == "__main__":
+    clean_postings()
@@ -1,70 +1,119 @@
+import os
 import re
+import numpy as np
 from sklearn.feature_extraction.text import CountVectorizer
 import pandas as pd
-from typing import List
+from typing import List, Optional
 
-def extract_skills_efficient(descriptions: pd.Series) -> List[List[str]]:
+DEFAULT_SKILL_VOCABULARY_PATH = os.path.join(os.path.dirname(__file__), 'data', 'skill_vocabulary.txt')
+
+# Words keep trailing '+' and '#' so "c++" and "c#" survive tokenization;
+# other punctuation splits words, so "ci/cd" and "asp.net" become bigrams
+SKILL_TOKEN_PATTERN = r"[a-z0-9]+[+#]*"
+
+# Single-letter skills ("r") only count as standalone words, so "r&d" and
+# "r.n." do not match: no '&' on either side, no '.' before, and no '.'
+# followed by another letter after
+SINGLE_LETTER_SKILL_PATTERN = r"(?<![a-z0-9&.]){}(?![a-z0-9+#&]|\.[a-z0-9])"
+
+def load_skill_vocabulary(path: Optional[str] = None) -> List[str]:
     """
-    Extract skills from job descriptions using CountVectorizer.
-    Much more efficient for large datasets.
+    Load a skill vocabulary file with one skill per line and '#' comments.
     
     Args:
-        descriptions: Series of job descriptions
+        path: Vocabulary file; defaults to SKILL_VOCABULARY_PATH or the bundled list
     
     Returns:
-        List of lists containing extracted skills for each description
+        List of skills in file order
     """
-    # Define skills vocabulary - extend as needed
-    skill_vocab = [
-        # Programming Languages
-        "python", "java", "javascript", "typescript", "c++", "c#", "go", "rust", "php", "ruby", "scala", "kotlin", "swift", "perl", "r",
-        # Web Development
-        "html", "css", "jquery", "bootstrap", "react", "angular", "vue", "node", "express", "django", "flask", "spring", "asp.net", "mvc",
-        # Mobile
-        "android", "ios", "react native", "flutter", "xamarin", "mobile development",
-        # Databases
-        "sql", "mysql", "postgresql", "mongodb", "nosql", "oracle", "sqlserver", "redis", "elasticsearch", "cassandra", "dynamodb",
-        # Cloud & DevOps
-        "aws", "azure", "gcp", "docker", "kubernetes", "jenkins", "terraform", "ansible", "ci/cd", "devops", "cloud", "serverless",
-        # Data Science & ML
-        "machine learning", "ai", "artificial intelligence", "data science", "deep learning", "nlp", "computer vision", "tensorflow", "pytorch", "pandas", "numpy", "scikit", "jupyter",
-        # Big Data
-        "hadoop", "spark", "kafka", "big data", "data engineering", "etl", "data warehouse", "data lake", "airflow",
-        # Design & Frontend
-        "ui", "ux", "user interface", "user experience", "figma", "sketch", "adobe", "photoshop", "illustrator", "responsive design", "sass", "less",
-        # Testing & QA
-        "testing", "qa", "quality assurance", "selenium", "junit", "pytest", "cucumber", "cypress", "jest", "mocha",
-        # Version Control
-        "git", "github", "gitlab", "bitbucket", "svn", "version control",
-        # Methodologies
-        "agile", "scrum", "kanban", "jira", "confluence", "tdd", "bdd", "waterfall", "lean",
-        # Soft Skills
-        "communication", "teamwork", "leadership", "problem solving", "critical thinking", "creativity", "collaboration", "time management",
-        # Business Skills
-        "project management", "product management", "business analysis", "marketing", "sales", "finance", "accounting", "hr", "recruiting"
-    ]
-    
-    # Fill NaN values
-    clean_descriptions = descriptions.fillna("").str.lower()
-    
-    # Initialize vectorizer with our skills vocabulary
-    vectorizer = CountVectorizer(vocabulary=skill_vocab)
+    path = path or os.getenv("SKILL_VOCABULARY_PATH") or DEFAULT_SKILL_VOCABULARY_PATH
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+class SkillExtractor:
+    """
+    Matches a skill vocabulary against descriptions as word n-grams.
     
-    # Transform descriptions to document-term matrix
-    skill_matrix = vectorizer.fit_transform(clean_descriptions)
+    Skills and descriptions are tokenized the same way, so multi-word
+    ("machine learning") and punctuated ("c++", "ci/cd") skills match
+    whatever whitespace or punctuation separates their words in the text.
+    """
     
-    # Convert to lists of skills
-    all_skills = []
-    feature_names = vectorizer.get_feature_names_out()
+    def __init__(self, vocabulary: List[str]):
+        """
+        Args:
+            vocabulary: Skills to look for; entries with the same tokens are merged
+        """
+        terms = {}
+        for skill in vocabulary:
+            term = " ".join(re.findall(SKILL_TOKEN_PATTERN, skill.lower()))
+            if term:
+                terms.setdefault(term, skill.title())
+        
+        self.vectorizer = CountVectorizer(
+            vocabulary=list(terms),
+            token_pattern=SKILL_TOKEN_PATTERN,
+            ngram_range=(1, max((term.count(" ") + 1 for term in terms), default=1)),
+            binary=True
+        )
+        # Display name for each column of the document-term matrix
+        self.skill_names = np.array(list(terms.values()), dtype=object)
+        # Columns of single-letter skills, re-checked against the raw text
+        self.single_letter_patterns = {
+            column: re.compile(SINGLE_LETTER_SKILL_PATTERN.format(re.escape(term)))
+            for column, term in enumerate(terms) if len(term) == 1
+        }
+    
+    def extract(self, descriptions: pd.Series) -> List[List[str]]:
+        """
+        Extract the skills mentioned in each description.
+        
+        Args:
+            descriptions: Series of job descriptions
+        
+        Returns:
+            List of lists containing extracted skills for each description, in vocabulary order
+        """
+        texts = descriptions.fillna("").str.lower()
+        skill_matrix = self.vectorizer.transform(texts)
+        
+        # Tokenization drops the punctuation around single letters, so verify those matches
+        if self.single_letter_patterns:
+            skill_matrix = skill_matrix.tocsc()
+            for column, pattern in self.single_letter_patterns.items():
+                start, end = skill_matrix.indptr[column], skill_matrix.indptr[column + 1]
+                for k in range(start, end):
+                    if not pattern.search(texts.iat[skill_matrix.indices[k]]):
+                        skill_matrix.data[k] = 0
+            skill_matrix = skill_matrix.tocsr()
+            skill_matrix.eliminate_zeros()
+        skill_matrix.sort_indices()
+        
+        # Look up every matched name at once from the CSR arrays, then slice per document
+        names = self.skill_names[skill_matrix.indices].tolist()
+        bounds = skill_matrix.indptr.tolist()
+        return [names[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+_default_skill_extractor: Optional[SkillExtractor] = None
+
+def extract_skills_efficient(descriptions: pd.Series, vocabulary: Optional[List[str]] = None) -> List[List[str]]:
+    """
+    Extract skills from job descriptions using an n-gram CountVectorizer.
+    Much more efficient for large datasets.
     
-    for i in range(skill_matrix.shape[0]):
-        # Get indices of non-zero elements (skills that appear in the description)
-        indices = skill_matrix[i].nonzero()[1]
-        # Get the corresponding skill names
-        doc_skills = [feature_names[idx].title() for idx in indices]
-        all_skills.append(doc_skills)
+    Args:
+        descriptions: Series of job descriptions
+        vocabulary: Optional skills to look for instead of the vocabulary file
     
-    return all_skills
+    Returns:
+        List of lists containing extracted skills for each description
+    """
+    global _default_skill_extractor
+    if vocabulary is not None:
+        return SkillExtractor(vocabulary).extract(descriptions)
+    if _default_skill_extractor is None:
+        _default_skill_extractor = SkillExtractor(load_skill_vocabulary())
+    return _default_skill_extractor.extract(descriptions)
 
 def clean_text(text: str) -> str:
     """
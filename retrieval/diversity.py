@@ -0,0 +1,83 @@
+import numpy as np
+from typing import List, Any, Optional
+
+def _code_values(values: List[Any]) -> np.ndarray:
+    """Integer code for each value, equal values sharing a code"""
+    codes = {}
+    return np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.intp, count=len(values))
+
+def mmr_select(
+    relevance: np.ndarray,
+    embeddings: Optional[np.ndarray],
+    n_results: int,
+    diversity_lambda: float = 0.7,
+    job_ids: Optional[List[Any]] = None,
+    titles: Optional[List[str]] = None,
+    companies: Optional[List[str]] = None,
+    max_per_title: int = 2,
+    max_per_company: int = 2
+) -> List[int]:
+    """
+    Pick a diverse subset of candidates with Maximal Marginal Relevance.
+
+    Each step selects the candidate maximising
+    diversity_lambda * relevance - (1 - diversity_lambda) * max similarity to
+    the candidates already selected, so near-duplicate postings are pushed
+    down. Duplicate job IDs are skipped and titles/companies that reached
+    their cap are masked out.
+
+    Args:
+        relevance: Relevance score for each candidate
+        embeddings: (n, d) candidate embeddings, or None to rank on relevance alone
+        n_results: Number of candidates to select
+        diversity_lambda: 1.0 is pure relevance, 0.0 is pure diversity
+        job_ids: Optional job ID for each candidate
+        titles: Optional normalized title for each candidate
+        companies: Optional company for each candidate
+        max_per_title: Maximum selected candidates sharing a title
+        max_per_company: Maximum selected candidates sharing a company
+
+    Returns:
+        Indices of the selected candidates in selection order
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    if n == 0 or n_results <= 0:
+        return []
+
+    if embeddings is not None and len(embeddings) == n:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        embeddings = embeddings / norms
+    else:
+        embeddings = None
+
+    groups = []
+    for values, cap in ((job_ids, 1), (titles, max_per_title), (companies, max_per_company)):
+        if values is not None:
+            codes = _code_values(values)
+            groups.append((codes, np.zeros(codes.max() + 1, dtype=np.intp), cap))
+
+    eligible = np.ones(n, dtype=bool)
+    max_similarity = np.zeros(n, dtype=np.float32)
+    selected = []
+
+    while len(selected) < n_results and eligible.any():
+        scores = diversity_lambda * relevance - (1.0 - diversity_lambda) * max_similarity
+        scores[~eligible] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        eligible[best] = False
+
+        # Mask every candidate whose job ID, title or company is now at its cap
+        for codes, counts, cap in groups:
+            code = codes[best]
+            counts[code] += 1
+            if counts[code] >= cap:
+                eligible &= codes != code
+
+        if embeddings is not None:
+            np.maximum(max_similarity, embeddings @ embeddings[best], out=max_similarity)
+
+    return selected
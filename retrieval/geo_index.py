@@ -0,0 +1,68 @@
+import numpy as np
+from sklearn.neighbors import BallTree
+from typing import List, Dict, Any, Set
+
+from normalizers import location_coordinates
+
+EARTH_RADIUS_MILES = 3958.8
+
+def haversine_miles(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance in miles from one point to arrays of points"""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def metadata_coordinates(metadatas: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Coordinates for each job as an (n, 2) array of (latitude, longitude), NaN when unknown.
+
+    Uses the coordinates stored at preprocessing time and falls back to
+    resolving location_normalized for postings indexed without them.
+    """
+    coords = np.full((len(metadatas), 2), np.nan, dtype=np.float64)
+    for i, metadata in enumerate(metadatas):
+        latitude = metadata.get('location_latitude')
+        longitude = metadata.get('location_longitude')
+        if latitude is None or longitude is None:
+            resolved = location_coordinates(metadata.get('location_normalized', ''))
+            if resolved is None:
+                continue
+            latitude, longitude = resolved
+        coords[i] = (latitude, longitude)
+    return coords
+
+class GeoIndex:
+    """
+    BallTree over job coordinates for "within N miles" lookups.
+    """
+
+    def __init__(self, job_ids: List[Any], coordinates: np.ndarray):
+        """
+        Args:
+            job_ids: Job ID for each row of coordinates
+            coordinates: (n, 2) array of (latitude, longitude); rows with NaN are skipped
+        """
+        known = ~np.isnan(coordinates).any(axis=1)
+        self.job_ids = np.asarray(job_ids, dtype=object)[known]
+        self.tree = BallTree(np.radians(coordinates[known]), metric='haversine') if known.any() else None
+
+    @classmethod
+    def from_metadatas(cls, metadatas: List[Dict[str, Any]]) -> "GeoIndex":
+        """Build the index from Chroma job metadata"""
+        return cls([m['job_id'] for m in metadatas], metadata_coordinates(metadatas))
+
+    def within_radius(self, latitude: float, longitude: float, miles: float) -> Set[Any]:
+        """
+        Job IDs located within the given radius of a point.
+        """
+        if self.tree is None:
+            return set()
+        indices = self.tree.query_radius(
+            np.radians([[latitude, longitude]]),
+            r=miles / EARTH_RADIUS_MILES
+        )[0]
+        return set(self.job_ids[indices].tolist())
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
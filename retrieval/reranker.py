@@ -0,0 +1,233 @@
+import os
+import numpy as np
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+from normalizers import (
+    normalize_title,
+    normalize_skill,
+    get_related_skills,
+    location_state,
+    is_state_location
+)
+from retrieval.geo_index import haversine_miles, metadata_coordinates
+
+# Order of the columns in the component score matrix
+SCORE_COMPONENTS = ('semantic', 'title', 'skills', 'location')
+
+DEFAULT_WEIGHTS = {
+    'semantic': 0.1,
+    'title': 0.3,
+    'skills': 0.2,
+    'location': 0.4
+}
+
+# Location score given to remote jobs when the query has a location
+REMOTE_LOCATION_SCORE = 0.8
+
+def _cosine_to_rows(vector: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity between one vector and every row of a matrix"""
+    vector = np.asarray(vector, dtype=np.float32)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    norms[norms == 0] = 1.0
+    return (matrix @ vector) / norms
+
+class CandidateReranker:
+    """
+    Scores a whole candidate set against a query with array operations.
+
+    Each component (semantic, title, skills, location) is computed as a
+    column of an (n_candidates, 4) matrix, and final scores are a single
+    weighted dot product over that matrix.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], location_decay_miles: Optional[float] = None):
+        """
+        Args:
+            encode: Function that encodes a list of texts into a 2-D embedding array
+            location_decay_miles: Distance at which the location score falls to 1/e
+        """
+        self.encode = encode
+        if location_decay_miles is None:
+            location_decay_miles = float(os.getenv("LOCATION_DECAY_MILES", 50))
+        self.location_decay_miles = location_decay_miles
+
+    def _similarity_to_texts(self, query_embedding: np.ndarray, texts: List[str]) -> np.ndarray:
+        """Cosine similarity between the query embedding and each text, encoding each distinct text once"""
+        unique_texts = list(dict.fromkeys(texts))
+        index = {text: i for i, text in enumerate(unique_texts)}
+        inverse = np.fromiter((index[text] for text in texts), dtype=np.intp, count=len(texts))
+
+        similarities = _cosine_to_rows(query_embedding, self.encode(unique_texts))
+        return similarities[inverse]
+
+    def title_scores(
+        self,
+        query_title: str,
+        query_title_embedding: np.ndarray,
+        job_titles: List[str]
+    ) -> np.ndarray:
+        """
+        Exact normalized-title matches score 1.0, everything else the
+        embedding similarity between the normalized titles.
+        """
+        job_titles = [normalize_title(title) for title in job_titles]
+        exact = np.array([title == query_title for title in job_titles], dtype=bool)
+
+        scores = exact.astype(np.float32)
+        if not exact.all() and query_title_embedding is not None:
+            others = [title for title, match in zip(job_titles, exact) if not match]
+            scores[~exact] = self._similarity_to_texts(query_title_embedding, others)
+        return scores
+
+    def skills_scores(self, query_skills: List[str], job_skills: List[str]) -> np.ndarray:
+        """
+        Fraction of query skills present in each job, plus half credit for
+        each missing query skill that has a related skill in the job.
+
+        Args:
+            query_skills: List of normalized skills from query
+            job_skills: Comma-separated skills string for each job
+        """
+        n_jobs = len(job_skills)
+        if not query_skills or n_jobs == 0:
+            return np.zeros(n_jobs, dtype=np.float32)
+
+        # Vocabulary: query skills first, then every skill related to them
+        related = [get_related_skills(skill) for skill in query_skills]
+        vocab = {skill: i for i, skill in enumerate(query_skills)}
+        for skills in related:
+            for skill in skills:
+                vocab.setdefault(skill, len(vocab))
+
+        # related_map[v, j] is True when vocabulary skill v is related to query skill j
+        related_map = np.zeros((len(vocab), len(query_skills)), dtype=np.float32)
+        for j, skills in enumerate(related):
+            related_map[[vocab[skill] for skill in skills], j] = 1.0
+
+        # incidence[i, v] is True when job i lists vocabulary skill v
+        incidence = np.zeros((n_jobs, len(vocab)), dtype=bool)
+        rows, cols = [], []
+        for i, skills in enumerate(job_skills):
+            for skill in normalize_skill(skills.split(',')):
+                col = vocab.get(skill)
+                if col is not None:
+                    rows.append(i)
+                    cols.append(col)
+        incidence[rows, cols] = True
+
+        exact = incidence[:, :len(query_skills)]
+        has_related = (incidence.astype(np.float32) @ related_map) > 0
+        partial = (has_related & ~exact).sum(axis=1) * 0.5
+
+        scores = (exact.sum(axis=1) + partial) / len(query_skills)
+        return np.minimum(scores, 1.0).astype(np.float32)
+
+    def location_scores(
+        self,
+        query_location: Optional[str],
+        query_coordinates: Optional[Tuple[float, float]],
+        job_locations: List[str],
+        job_coordinates: np.ndarray,
+        remote: np.ndarray
+    ) -> np.ndarray:
+        """
+        Remote jobs get a fixed high score; other jobs decay exponentially
+        with their distance from the query location. Jobs without coordinates
+        (or queries that cannot be placed) fall back to exact location matching.
+        A state-level query scores every job located in that state 1.0, since
+        distance from the state's centroid says nothing about a match.
+        """
+        scores = np.zeros(len(job_locations), dtype=np.float32)
+        if not query_location or len(job_locations) == 0:
+            return scores
+
+        exact = np.array([loc == query_location for loc in job_locations], dtype=bool)
+        scores[exact] = 1.0
+
+        if is_state_location(query_location):
+            query_state = location_state(query_location)
+            states = {loc: location_state(loc) for loc in set(job_locations)}
+            scores[[states[loc] == query_state for loc in job_locations]] = 1.0
+        elif query_coordinates is not None:
+            known = ~np.isnan(job_coordinates).any(axis=1)
+            if known.any():
+                distances = haversine_miles(
+                    query_coordinates[0],
+                    query_coordinates[1],
+                    job_coordinates[known, 0],
+                    job_coordinates[known, 1]
+                )
+                scores[known] = np.maximum(scores[known], np.exp(-distances / self.location_decay_miles))
+
+        scores[remote] = REMOTE_LOCATION_SCORE
+        return scores
+
+    def score(
+        self,
+        query_embeddings: Dict[str, np.ndarray],
+        query_title: str,
+        query_skills: List[str],
+        query_location: Optional[str],
+        metadatas: List[Dict[str, Any]],
+        distances: np.ndarray,
+        weights: Optional[Dict[str, float]] = None,
+        query_coordinates: Optional[Tuple[float, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every candidate against the query.
+
+        Args:
+            query_embeddings: Encoded query fields (see JobRetriever.encode_query)
+            query_title: Normalized title from query
+            query_skills: List of normalized skills from query
+            query_location: Normalized location from query
+            metadatas: Job metadata for each candidate
+            distances: Cosine distances returned by the vector index
+            weights: Optional dictionary of weights for each component
+            query_coordinates: (latitude, longitude) of the query location, if known
+
+        Returns:
+            Tuple of (final scores, component matrix with columns in SCORE_COMPONENTS order)
+        """
+        if weights is None:
+            weights = DEFAULT_WEIGHTS
+
+        n = len(metadatas)
+        components = np.zeros((n, len(SCORE_COMPONENTS)), dtype=np.float32)
+        if n == 0:
+            return np.zeros(0, dtype=np.float32), components
+
+        remote = np.array([bool(m.get('remote_allowed', False)) for m in metadatas], dtype=bool)
+
+        components[:, 0] = 1 - np.asarray(distances, dtype=np.float32)
+        components[:, 1] = self.title_scores(
+            query_title,
+            query_embeddings.get('title'),
+            [m['title_clean'] for m in metadatas]
+        )
+        components[:, 2] = self.skills_scores(
+            query_skills,
+            [m['combined_skills'] for m in metadatas]
+        )
+        components[:, 3] = self.location_scores(
+            query_location,
+            query_coordinates,
+            [m['location_normalized'] for m in metadatas],
+            metadata_coordinates(metadatas) if query_coordinates is not None else None,
+            remote
+        )
+
+        weight_vector = np.array(
+            [weights.get(component, 0.0) for component in SCORE_COMPONENTS],
+            dtype=np.float32
+        )
+        return components @ weight_vector, components
+
+    @staticmethod
+    def component_dicts(components: np.ndarray) -> List[Dict[str, float]]:
+        """Convert a component matrix into one score dictionary per candidate"""
+        return [
+            dict(zip(SCORE_COMPONENTS, row))
+            for row in components.tolist()
+        ]
@@ -1,58 +1,230 @@
 import chromadb
+import json
 import os
-import shutil
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from vector_db.build_vector_db import build_vector_database
-from typing import List, Dict, Any, Optional
+from vector_db.stores import ChromaVectorStore, InProcessVectorStore
+from embedding.cache import get_embedding_cache
+from embedding.models import load_embedding_model, get_backend, cache_namespace
+from retrieval.reranker import CandidateReranker, DEFAULT_WEIGHTS
+from retrieval.geo_index import GeoIndex
+from retrieval.telemetry import SearchTelemetry
+from retrieval.diversity import mmr_select
+from typing import List, Dict, Any, Optional, Tuple
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
 from normalizers import (
     normalize_location,
+    location_coordinates,
+    location_state,
+    is_state_location,
     normalize_title,
-    normalize_skill,
-    get_related_skills
+    normalize_skill
 )
 
+# Weights used to combine query fields into a single index lookup vector.
+# These match the title/location/skills weights used in embedding/vector_embedding.py.
+QUERY_EMBEDDING_WEIGHTS = {
+    'query': 0.2,
+    'location': 0.7,
+    'skills': 0.1
+}
+
+# Adaptive candidate depth: initial pool is n_results * CANDIDATE_POOL_MULTIPLIER
+# (at least MIN_CANDIDATE_POOL), doubled while results come back short,
+# never more than MAX_CANDIDATE_POOL.
+CANDIDATE_POOL_MULTIPLIER = int(os.getenv("CANDIDATE_POOL_MULTIPLIER", 4))
+MIN_CANDIDATE_POOL = int(os.getenv("MIN_CANDIDATE_POOL", 20))
+MAX_CANDIDATE_POOL = int(os.getenv("MAX_CANDIDATE_POOL", 400))
+
+# MMR diversification: relevance/diversity trade-off and per-title/company caps
+DIVERSITY_LAMBDA = float(os.getenv("DIVERSITY_LAMBDA", 0.7))
+MAX_RESULTS_PER_TITLE = int(os.getenv("MAX_RESULTS_PER_TITLE", 2))
+MAX_RESULTS_PER_COMPANY = int(os.getenv("MAX_RESULTS_PER_COMPANY", 2))
+
+# Largest radius match set pushed down to the index as a job_id filter;
+# bigger sets are applied to the candidates after retrieval instead.
+MAX_PUSHDOWN_IDS = int(os.getenv("MAX_PUSHDOWN_IDS", 5000))
+
+# Vector index backend: 'chroma' (persistent HNSW) or 'inprocess'
+# (exact or IVF search over the memory-mapped embedding matrix)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma").lower()
+
 class JobRetriever:
     def __init__(self, db_path="./chroma_db"):
         """Initialize the retriever with the path to the Chroma database"""
         print("Initializing JobRetriever...")
         
         # Load the embedding model
-        self.model = SentenceTransformer('TechWolf/JobBERT-v2')
-        print("Loaded embedding model: TechWolf/JobBERT-v2")
+        self.model_name = 'TechWolf/JobBERT-v2'
+        self.backend = get_backend()
+        self.model = load_embedding_model(self.model_name, self.backend)
+        print(f"Loaded embedding model: {self.model_name} ({self.backend} backend)")
+        
+        # Shared embedding cache so repeated strings are only encoded once per process
+        self.embedding_cache = get_embedding_cache()
+        
+        # Batch reranker for scoring candidate sets
+        self.reranker = CandidateReranker(self.get_embeddings)
+        
+        # Relevance/diversity trade-off for MMR selection (1.0 = relevance only)
+        self.diversity_lambda = DIVERSITY_LAMBDA
+        
+        # Aggregate stats on how deep searches go into the index
+        self.search_telemetry = SearchTelemetry()
         
         # Initialize TF-IDF vectorizer for skills
         self.skill_vectorizer = TfidfVectorizer(lowercase=True)
         
-        # Connect to the Chroma database
+        # Connect to the vector index: the Chroma database, or with
+        # VECTOR_STORE=inprocess an index over the embedding matrix itself
+        if VECTOR_STORE == "inprocess":
+            self.collection = InProcessVectorStore.from_artifacts()
+        elif VECTOR_STORE == "chroma":
+            try:
+                self.client = chromadb.PersistentClient(path=db_path)
+                self.collection = ChromaVectorStore(self.client.get_collection("job_listings"))
+                count = self.collection.count()
+                print(f"Connected to existing collection 'job_listings' with {count} documents")
+            except Exception as e:
+                print(f"Error connecting to collection: {e}")
+                
+                # Bring the index up to date in place; unchanged postings are kept
+                build_vector_database(db_path)
+                
+                # Try connecting again
+                self.client = chromadb.PersistentClient(path=db_path)
+                self.collection = ChromaVectorStore(self.client.get_collection("job_listings"))
+                count = self.collection.count()
+                print(f"Rebuilt collection 'job_listings' with {count} documents")
+        else:
+            raise ValueError(f"Unknown VECTOR_STORE: {VECTOR_STORE} (expected 'chroma' or 'inprocess')")
+        
+        # job_id -> Chroma id for point lookups, and a spatial index over
+        # job coordinates for radius filters, built from one metadata scan
+        self.job_id_index: Dict[str, str] = {}
+        self.geo_index = self._build_indexes()
+    
+    def _build_indexes(self) -> Optional[GeoIndex]:
+        """
+        Fill the job_id index and build the geo index from the stored metadata.
+        
+        Returns:
+            The geo index, or None if the metadata could not be read
+        """
         try:
-            self.client = chromadb.PersistentClient(path=db_path)
-            self.collection = self.client.get_collection("job_listings")
-            count = self.collection.count()
-            print(f"Connected to existing collection 'job_listings' with {count} documents")
+            records = self.collection.get(include=["metadatas"])
         except Exception as e:
-            print(f"Error connecting to collection: {e}")
-            
-            if os.path.exists(db_path):
-                shutil.rmtree(db_path)
-            
-            # Rebuild the database
-            build_vector_database()
-            
-            # Try connecting again
-            self.client = chromadb.PersistentClient(path=db_path)
-            self.collection = self.client.get_collection("job_listings")
-            count = self.collection.count()
-            print(f"Rebuilt collection 'job_listings' with {count} documents")
+            print(f"Error reading job metadata: {e}")
+            return None
         
+        self.job_id_index = {
+            str(metadata['job_id']): chroma_id
+            for chroma_id, metadata in zip(records['ids'], records['metadatas'])
+        }
+        print(f"Indexed {len(self.job_id_index)} job ids")
         
+        try:
+            geo_index = GeoIndex.from_metadatas(records['metadatas'])
+            print(f"Built geo index over {len(geo_index)} located jobs")
+            return geo_index
+        except Exception as e:
+            print(f"Error building geo index: {e}")
+            return None
     
     def get_embedding(self, text: str) -> np.ndarray:
         """Convert text to embedding vector"""
-        return self.model.encode(text)
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Convert a list of texts to embedding vectors.
+        
+        Texts already in the embedding cache are served from it; the rest are
+        encoded together in a single model batch.
+        """
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return self.embedding_cache.get_or_encode(
+            texts,
+            lambda missing: self.model.encode(missing, batch_size=min(len(missing), 128)),
+            namespace=cache_namespace(self.model_name, self.backend)
+        )
+
+    def encode_query(
+        self,
+        query: str,
+        query_location: Optional[str] = None,
+        query_skills: Optional[List[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Encode every text a search needs in one model batch.
+        
+        Missing fields (no location, no skills) are left out of the batch and
+        of the returned dictionary rather than being sent to the model as None.
+        
+        Args:
+            query: The search query
+            query_location: Normalized location from query
+            query_skills: List of normalized skills from query
+            
+        Returns:
+            Dictionary mapping field name ('query', 'title', 'location', 'skills') to embedding
+        """
+        return self.encode_queries([(query, query_location, query_skills)])[0]
+
+    def encode_queries(
+        self,
+        queries: List[Tuple[str, Optional[str], Optional[List[str]]]]
+    ) -> List[Dict[str, np.ndarray]]:
+        """
+        Encode the fields of many queries in one model batch.
+        
+        Args:
+            queries: List of (query, normalized location, normalized skills) tuples
+            
+        Returns:
+            One dictionary per query, as returned by encode_query
+        """
+        per_query_texts = []
+        for query, query_location, query_skills in queries:
+            texts = {
+                'query': query,
+                'title': normalize_title(query),
+                'location': query_location,
+                'skills': ', '.join(query_skills) if query_skills else None
+            }
+            per_query_texts.append({field: text for field, text in texts.items() if text})
+        
+        embeddings = self.get_embeddings([
+            text for texts in per_query_texts for text in texts.values()
+        ])
+        
+        encoded, offset = [], 0
+        for texts in per_query_texts:
+            encoded.append(dict(zip(texts.keys(), embeddings[offset:offset + len(texts)])))
+            offset += len(texts)
+        return encoded
+
+    def build_query_embedding(self, query_embeddings: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Combine encoded query fields into the vector used for the index lookup.
+        
+        Mirrors the title/location/skills weighting used when the index is built,
+        renormalizing the weights over the fields that are actually present.
+        
+        Args:
+            query_embeddings: Output of encode_query
+            
+        Returns:
+            Weighted query embedding
+        """
+        present = {
+            field: weight for field, weight in QUERY_EMBEDDING_WEIGHTS.items()
+            if field in query_embeddings
+        }
+        total = sum(present.values())
+        return sum(query_embeddings[field] * (weight / total) for field, weight in present.items())
     
     def compute_similarity_scores(
         self,
@@ -61,11 +233,14 @@ class JobRetriever:
         query_location: Optional[str],
         job_metadata: Dict[str, Any],
         job_doc: str,
-        semantic_score: float
+        semantic_score: float,
+        query_embeddings: Optional[Dict[str, np.ndarray]] = None
     ) -> Dict[str, float]:
         """
         Compute multi-factor similarity scores between query and job.
         
+        Single-candidate convenience wrapper around the batch reranker used by search_jobs.
+        
         Args:
             query: The search query
             query_skills: List of normalized skills from query
@@ -73,80 +248,24 @@ class JobRetriever:
             job_metadata: Job metadata
             job_doc: Job description
             semantic_score: Pre-computed semantic similarity score
+            query_embeddings: Optional pre-computed query embeddings from encode_query
             
         Returns:
             Dictionary of component scores
         """
-        scores = {
-            'semantic': semantic_score,
-            'title': 0.0,
-            'skills': 0.0,
-            'location': 0.0
-        }
+        if query_embeddings is None:
+            query_embeddings = self.encode_query(query, query_location, query_skills)
         
-        # Title similarity
-        query_title = normalize_title(query)
-        job_title = normalize_title(job_metadata['title_clean'])
-        if query_title == job_title:
-            scores['title'] = 1.0
-        else:
-            # Use semantic similarity for non-exact matches
-            title_embedding = self.get_embedding(query_title)
-            job_title_embedding = self.get_embedding(job_title)
-            scores['title'] = cosine_similarity(
-                title_embedding.reshape(1, -1),
-                job_title_embedding.reshape(1, -1)
-            )[0][0]
-        
-        # Skills similarity
-        if query_skills:
-            # Get job skills
-            job_skills = normalize_skill(job_metadata['combined_skills'].split(','))
-            
-            # Calculate skill overlap
-            common_skills = set(query_skills) & set(job_skills)
-            if query_skills:
-                scores['skills'] = len(common_skills) / len(query_skills)
-            
-            # Add partial credit for related skills
-            if scores['skills'] < 1.0:
-                related_matches = 0
-                for skill in query_skills:
-                    if skill not in common_skills:
-                        related = get_related_skills(skill)
-                        if any(r in job_skills for r in related):
-                            related_matches += 0.5
-                if query_skills:
-                    scores['skills'] += (related_matches / len(query_skills))
-                scores['skills'] = min(scores['skills'], 1.0)
-        
-        # Location matching
-        if query_location:
-            job_location = job_metadata['location_normalized']
-            print(job_location, query_location)
-            
-            # Handle remote jobs first
-            if job_metadata.get('remote_allowed', False):
-                scores['location'] = 0.8  # High score for remote jobs
-            else:
-                # Use embedding similarity for location matching
-                location_embedding = self.get_embedding(query_location)
-                job_location_embedding = self.get_embedding(job_location)
-                
-                location_similarity = cosine_similarity(
-                    location_embedding.reshape(1, -1),
-                    job_location_embedding.reshape(1, -1)
-                )[0][0]
-                
-                # Scale similarity and favor exact matches
-                scores['location'] = location_similarity * 0.5
-                
-                # Boost score for exact matches
-                if query_location == job_location:
-                    scores['location'] = 1.0
-        ## Debug purpose
-        # print(scores)
-        return scores
+        _, components = self.reranker.score(
+            query_embeddings=query_embeddings,
+            query_title=normalize_title(query),
+            query_skills=query_skills,
+            query_location=query_location,
+            metadatas=[job_metadata],
+            distances=np.array([1 - semantic_score]),
+            query_coordinates=location_coordinates(query_location) if query_location else None
+        )
+        return self.reranker.component_dicts(components)[0]
     
     def compute_final_score(self, scores: Dict[str, float], weights: Optional[Dict[str, float]] = None) -> float:
         """
@@ -160,12 +279,7 @@ class JobRetriever:
             Final weighted score
         """
         if weights is None:
-            weights = {
-                'semantic': 0.1,
-                'title': 0.3,
-                'skills': 0.2,
-                'location': 0.4
-            }
+            weights = DEFAULT_WEIGHTS
         
         final_score = 0.0
         for component, score in scores.items():
@@ -173,6 +287,241 @@ class JobRetriever:
         
         return final_score
     
+    def _prepare_search(self, query: str, filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Extract and normalize the query components of a search.
+        
+        Args:
+            query: Search query
+            filters: Optional filters (location, skills, remote, radius_miles,
+                strict_location, companies, exclude_companies)
+            
+        Returns:
+            Dictionary of normalized query components
+        """
+        filters = filters or {}
+        
+        query_skills = []
+        query_location = None
+        if 'skills' in filters:
+            query_skills = normalize_skill(filters['skills'].split(','))
+        if 'location' in filters:
+            query_location = normalize_location(filters['location'], enable_geolocator=True)
+        query_coordinates = location_coordinates(query_location) if query_location else None
+        
+        # Jobs within the requested radius, if any; remote jobs are always eligible.
+        # A radius around a state's centroid is meaningless, so it is ignored for states.
+        radius_job_ids = None
+        if filters.get('radius_miles') and is_state_location(query_location):
+            print(f"Ignoring radius_miles for state-level location '{query_location}'")
+        elif filters.get('radius_miles') and query_coordinates and self.geo_index is not None:
+            radius_job_ids = self.geo_index.within_radius(*query_coordinates, filters['radius_miles'])
+        
+        search = {
+            "query": query.strip(),
+            "filters": filters,
+            "query_title": normalize_title(query),
+            "query_skills": query_skills,
+            "query_location": query_location,
+            "query_coordinates": query_coordinates,
+            "radius_job_ids": radius_job_ids
+        }
+        search["where"] = self._build_where(search)
+        return search
+    
+    def _build_where(self, search: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Translate hard filters into a Chroma where clause so the index only
+        returns eligible postings.
+        
+        Args:
+            search: Output of _prepare_search (without 'where')
+            
+        Returns:
+            Where clause, or None when the search has no hard filters
+        """
+        filters = search["filters"]
+        conditions = []
+        
+        if filters.get("remote"):
+            conditions.append({"remote_allowed": True})
+        if filters.get("companies"):
+            conditions.append({"company_name": {"$in": sorted(filters["companies"])}})
+        if filters.get("exclude_companies"):
+            conditions.append({"company_name": {"$nin": sorted(filters["exclude_companies"])}})
+        query_location = search["query_location"]
+        if filters.get("strict_location") and query_location and query_location != 'united states':
+            # A state matches every posting located in it; metro cities normalize
+            # to their metro name, so an exact match also covers a whole metro.
+            # A country-level location restricts nothing.
+            if is_state_location(query_location):
+                location_condition = {"location_state": location_state(query_location)}
+            else:
+                location_condition = {"location_normalized": query_location}
+            conditions.append({
+                "$or": [
+                    location_condition,
+                    {"remote_allowed": True}
+                ]
+            })
+        
+        # Radius: push the matching job IDs down when the set is small enough
+        radius_job_ids = search["radius_job_ids"]
+        if radius_job_ids is not None and len(radius_job_ids) <= MAX_PUSHDOWN_IDS:
+            if radius_job_ids:
+                conditions.append({
+                    "$or": [
+                        {"job_id": {"$in": sorted(radius_job_ids)}},
+                        {"remote_allowed": True}
+                    ]
+                })
+            else:
+                conditions.append({"remote_allowed": True})
+        
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+    
+    def _query_index(
+        self,
+        query_vectors: List[np.ndarray],
+        wheres: List[Optional[Dict[str, Any]]],
+        n_results: List[int]
+    ) -> List[Dict[str, List[Any]]]:
+        """
+        Query the index for many vectors, one collection.query call per
+        distinct (where clause, candidate depth) pair.
+        
+        Args:
+            query_vectors: Combined query embedding for each search
+            wheres: Where clause for each search (None for no filtering)
+            n_results: Number of candidates to fetch for each search
+            
+        Returns:
+            One dictionary per search with 'ids', 'documents', 'metadatas',
+            'distances' and 'embeddings' lists
+        """
+        groups: Dict[Tuple[str, int], List[int]] = {}
+        for i, (where, depth) in enumerate(zip(wheres, n_results)):
+            key = (json.dumps(where, sort_keys=True, default=str), depth)
+            groups.setdefault(key, []).append(i)
+        
+        results: List[Optional[Dict[str, List[Any]]]] = [None] * len(query_vectors)
+        for (_, depth), indices in groups.items():
+            where = wheres[indices[0]]
+            response = self.collection.query(
+                query_embeddings=[query_vectors[i].tolist() for i in indices],
+                n_results=depth,
+                where=where,
+                include=["documents", "metadatas", "distances", "embeddings"]
+            )
+            for row, i in enumerate(indices):
+                results[i] = {
+                    key: (response[key][row] if response.get(key) is not None else [])
+                    for key in ("ids", "documents", "metadatas", "distances", "embeddings")
+                }
+        return results
+    
+    def _rank_candidates(
+        self,
+        search: Dict[str, Any],
+        query_embeddings: Dict[str, np.ndarray],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        distances: List[float],
+        n_results: int,
+        weights: Optional[Dict[str, float]] = None,
+        embeddings: Optional[List[np.ndarray]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter, rerank and diversify the candidates returned for one search.
+        
+        Args:
+            search: Output of _prepare_search
+            query_embeddings: Output of encode_query for this search
+            documents: Candidate documents
+            metadatas: Candidate metadata
+            distances: Candidate cosine distances
+            n_results: Number of results to return
+            weights: Optional weights for scoring components
+            embeddings: Candidate document embeddings, used for diversification
+            
+        Returns:
+            List of ranked job results
+        """
+        filters = search["filters"]
+        distances = np.asarray(distances, dtype=np.float32)
+        
+        # Apply hard filters first
+        keep = np.ones(len(metadatas), dtype=bool)
+        if filters.get("remote"):
+            keep &= np.array([bool(m['remote_allowed']) for m in metadatas], dtype=bool)
+        if search["radius_job_ids"] is not None:
+            keep &= np.array(
+                [bool(m['remote_allowed']) or m['job_id'] in search["radius_job_ids"] for m in metadatas],
+                dtype=bool
+            )
+        keep_idx = np.flatnonzero(keep)
+        metadatas = [metadatas[i] for i in keep_idx]
+        documents = [documents[i] for i in keep_idx]
+        if embeddings is not None and len(embeddings) == len(keep):
+            embeddings = np.asarray(embeddings, dtype=np.float32)[keep_idx]
+        else:
+            embeddings = None
+        
+        # Score the whole candidate set at once
+        final_scores, components = self.reranker.score(
+            query_embeddings=query_embeddings,
+            query_title=search["query_title"],
+            query_skills=search["query_skills"],
+            query_location=search["query_location"],
+            metadatas=metadatas,
+            distances=distances[keep_idx],
+            weights=weights,
+            query_coordinates=search["query_coordinates"]
+        )
+        component_scores = self.reranker.component_dicts(components)
+        
+        # Keep candidates whose score is good enough, best first
+        passing = np.flatnonzero(final_scores > 0.3)  # Minimum threshold
+        passing = passing[np.argsort(-final_scores[passing], kind='stable')]
+        
+        # Diversify with MMR over the candidate embeddings; this also applies the
+        # title/company caps, so it runs even when few candidates pass
+        if len(passing):
+            passing = passing[mmr_select(
+                final_scores[passing],
+                embeddings[passing] if embeddings is not None else None,
+                n_results,
+                diversity_lambda=self.diversity_lambda,
+                job_ids=[metadatas[i]['job_id'] for i in passing],
+                titles=[normalize_title(metadatas[i]['title_clean']) for i in passing],
+                companies=[metadatas[i]['company_name'] for i in passing],
+                max_per_title=MAX_RESULTS_PER_TITLE,
+                max_per_company=MAX_RESULTS_PER_COMPANY
+            )]
+        
+        candidates = []
+        for i in passing:
+            metadata = metadatas[i]
+            job_url = f"https://www.linkedin.com/jobs/view/{metadata['job_id']}"
+            candidates.append({
+                "rank": len(candidates) + 1,
+                "title": metadata['title_clean'],
+                "company": metadata['company_name'],
+                "location": metadata['location'],
+                "remote": metadata['remote_allowed'],
+                "skills": metadata['combined_skills'],
+                "similarity": float(final_scores[i]),
+                "component_scores": component_scores[i],
+                "job_id": metadata['job_id'],
+                "job_url": job_url,
+                "document": documents[i]
+            })
+        return candidates
+    
     def search_jobs(
         self,
         query: str,
@@ -185,7 +534,8 @@ class JobRetriever:
         
         Args:
             query: Search query
-            filters: Optional filters (location, skills, etc.)
+            filters: Optional filters (location, skills, remote, radius_miles,
+                strict_location, companies, exclude_companies)
             n_results: Number of results to return
             weights: Optional weights for scoring components
             
@@ -194,183 +544,168 @@ class JobRetriever:
         """
         print(f"Searching for: '{query}' with filters: {filters}")
         
+        results = self.search_jobs_batch([{
+            "query": query,
+            "filters": filters,
+            "n_results": n_results,
+            "weights": weights
+        }])[0]
+        
+        print(f"Found {len(results)} matching jobs after filtering and diversity")
+        return results
+    
+    def search_jobs_batch(self, searches: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Run many searches in one pass.
+        
+        All query fields are encoded in a single model batch, query embeddings
+        sharing a where clause go to the index in a single query call, and the
+        titles of all candidate sets are encoded together before each set is
+        reranked with its own filters and weights.
+        
+        Candidate depth is adaptive: each search starts with a pool sized from
+        its n_results and is re-queried at twice the depth only while the
+        threshold, filters and diversity leave it short, up to MAX_CANDIDATE_POOL.
+        
+        Args:
+            searches: List of dictionaries with keys 'query' and optionally
+                'filters', 'n_results' (default 5) and 'weights'
+            
+        Returns:
+            One list of ranked job results per search, in input order
+        """
+        if not searches:
+            return []
+        
         try:
-            # Extract and normalize query components
-            query_skills = []
-            query_location = None
-            if filters:
-                if 'skills' in filters:
-                    query_skills = normalize_skill(filters['skills'].split(','))
-                if 'location' in filters:
-                    query_location = normalize_location(filters['location'], enable_geolocator=True)
-
-            # Get initial candidates using semantic search
-            title_emb = self.get_embedding(query)
-            location_emb = self.get_embedding(query_location)
-            skills_emb = self.get_embedding(query_skills)
-
-            TITLE_WEIGHT = 0.2
-            LOCATION_WEIGHT = 0.7
-            SKILLS_WEIGHT = 0.1
-
-            # Compute weighted sum
-            query_embedding = TITLE_WEIGHT * title_emb + LOCATION_WEIGHT * location_emb + SKILLS_WEIGHT * skills_emb
-
-            results = self.collection.query(
-                query_embeddings=query_embedding.tolist(),
-                n_results=100,  # Get more results initially for reranking
-                include=["documents", "metadatas", "distances"]
-            )
+            prepared = [self._prepare_search(s["query"], s.get("filters")) for s in searches]
+            wanted = [s.get("n_results") or 5 for s in searches]
             
-            # Process and rerank results
-            candidates = []
-            if results['ids'] and results['ids'][0]:
-                for i, (doc, metadata, distance) in enumerate(zip(
-                    results['documents'][0],
-                    results['metadatas'][0],
-                    results['distances'][0]
-                )):
-                    # Apply hard filters first
-                    if filters:
-                        # Remote filter
-                        if "remote" in filters and filters["remote"] and \
-                        not metadata['remote_allowed']:
-                            continue
-                    
-                    # Compute component scores
-                    semantic_score = 1 - distance
-                    ## Debug purpose
-                    # print(metadata['location_normalized'])
-                    scores = self.compute_similarity_scores(
-                        query=query,
-                        query_skills=query_skills,
-                        query_location=query_location,
-                        job_metadata=metadata,
-                        job_doc=doc,
-                        semantic_score=semantic_score
+            # Encode all query fields in one batch, then combine for semantic search
+            query_embeddings = self.encode_queries([
+                (p["query"], p["query_location"], p["query_skills"]) for p in prepared
+            ])
+            
+            # A search with no query, location or skills has nothing to look up
+            active = [
+                i for i, e in enumerate(query_embeddings)
+                if any(field in e for field in QUERY_EMBEDDING_WEIGHTS)
+            ]
+            query_vectors = {i: self.build_query_embedding(query_embeddings[i]) for i in active}
+            
+            depths = [
+                min(max(n * CANDIDATE_POOL_MULTIPLIER, MIN_CANDIDATE_POOL), MAX_CANDIDATE_POOL)
+                for n in wanted
+            ]
+            ranked: List[List[Dict[str, Any]]] = [[] for _ in searches]
+            search_stats = [
+                {"rounds": 0, "depth": 0, "candidates_fetched": 0, "exhausted": False}
+                for _ in searches
+            ]
+            
+            searched = list(active)
+            while active:
+                results = self._query_index(
+                    [query_vectors[i] for i in active],
+                    [prepared[i]["where"] for i in active],
+                    [depths[i] for i in active]
+                )
+                
+                # Encode the distinct candidate titles of every search together,
+                # so per-search reranking is served from the embedding cache
+                candidate_titles = {
+                    normalize_title(m['title_clean'])
+                    for result in results for m in result['metadatas']
+                }
+                self.get_embeddings(sorted(candidate_titles))
+                
+                still_short = []
+                for i, result in zip(active, results):
+                    ranked[i] = self._rank_candidates(
+                        prepared[i],
+                        query_embeddings[i],
+                        result['documents'],
+                        result['metadatas'],
+                        result['distances'],
+                        n_results=wanted[i],
+                        weights=searches[i].get("weights"),
+                        embeddings=result['embeddings']
                     )
                     
-                    # Compute final score
-                    final_score = self.compute_final_score(scores, weights)
+                    fetched = len(result['ids'])
+                    stats = search_stats[i]
+                    stats["rounds"] += 1
+                    stats["depth"] = depths[i]
+                    stats["candidates_fetched"] += fetched
+                    stats["exhausted"] = fetched < depths[i]
                     
-                    # Add to candidates if score is good enough
-                    if final_score > 0.3:  # Minimum threshold
-                        job_url = f"https://www.linkedin.com/jobs/view/{metadata['job_id']}"
-                        candidates.append({
-                            "rank": len(candidates) + 1,
-                            "title": metadata['title_clean'],
-                            "company": metadata['company_name'],
-                            "location": metadata['location'],
-                            "remote": metadata['remote_allowed'],
-                            "skills": metadata['combined_skills'],
-                            "similarity": final_score,
-                            "component_scores": scores,
-                            "job_id": metadata['job_id'],
-                            "job_url": job_url,
-                            "document": doc
-                        })
+                    # Go deeper only if short and the index still has more to give
+                    if len(ranked[i]) < wanted[i] and not stats["exhausted"] and depths[i] < MAX_CANDIDATE_POOL:
+                        depths[i] = min(depths[i] * 2, MAX_CANDIDATE_POOL)
+                        still_short.append(i)
+                active = still_short
             
-            # Sort by final score and apply diversity
-            candidates.sort(key=lambda x: x['similarity'], reverse=True)
-            diverse_results = self._ensure_diversity(candidates, n_results)
-            
-            print(f"Found {len(diverse_results)} matching jobs after filtering and diversity")
-            return diverse_results
+            for i in searched:
+                stats = search_stats[i]
+                stats["requested"] = wanted[i]
+                stats["returned"] = len(ranked[i])
+                self.search_telemetry.record(stats)
+                print(f"Search depth for '{prepared[i]['query']}': {stats}")
+            return ranked
             
         except Exception as e:
             print(f"Error during search: {e}")
-            return []
+            return [[] for _ in searches]
     
-    def _ensure_diversity(
-        self,
-        candidates: List[Dict[str, Any]],
-        n_results: int
-    ) -> List[Dict[str, Any]]:
+    def get_job_by_id(self, job_id: str) -> Optional[Dict[str, Any]]:
         """
-        Ensure diversity in results by avoiding duplicate and too similar jobs.
+        Retrieve a specific job by its ID.
         
         Args:
-            candidates: List of candidate jobs
-            n_results: Number of results desired
+            job_id: The LinkedIn job ID
             
         Returns:
-            Diverse subset of candidates
+            Job details or None if not found
         """
-        if len(candidates) <= n_results:
-            return candidates
-        
-        diverse_results = []
-        seen_job_ids = set()
-        seen_titles = set()
-        seen_companies = set()
-        
-        # Always include top result
-        if candidates:
-            diverse_results.append(candidates[0])
-            seen_job_ids.add(candidates[0]['job_id'])
-            seen_titles.add(normalize_title(candidates[0]['title']))
-            seen_companies.add(candidates[0]['company'])
-        
-        # Add remaining results ensuring diversity
-        for job in candidates[1:]:
-            if len(diverse_results) >= n_results:
-                break
-                
-            # Skip exact duplicate jobs
-            if job['job_id'] in seen_job_ids:
-                continue
-            
-            normalized_title = normalize_title(job['title'])
-            
-            # Skip if we have too many of same title or company
-            if (
-                sum(1 for t in seen_titles if t == normalized_title) >= 2 or
-                sum(1 for c in seen_companies if c == job['company']) >= 2
-            ):
-                continue
-            
-            diverse_results.append(job)
-            seen_job_ids.add(job['job_id'])
-            seen_titles.add(normalized_title)
-            seen_companies.add(job['company'])
-        
-        return diverse_results
+        return self.get_jobs_by_ids([job_id]).get(str(job_id))
     
-    def get_job_by_id(self, job_id: str) -> Optional[Dict[str, Any]]:
+    def get_jobs_by_ids(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """
-        Retrieve a specific job by its ID.
+        Retrieve many jobs by ID with a single id lookup against the collection.
         
         Args:
-            job_id: The LinkedIn job ID
+            job_ids: LinkedIn job IDs
             
         Returns:
-            Job details or None if not found
+            Dictionary of job details keyed by job ID; unknown IDs are left out
         """
+        job_ids = list(dict.fromkeys(str(job_id) for job_id in job_ids))
+        if self.job_id_index:
+            chroma_ids = [self.job_id_index[job_id] for job_id in job_ids if job_id in self.job_id_index]
+        else:
+            # Index unavailable: collections are keyed by job_id
+            chroma_ids = job_ids
+        if not chroma_ids:
+            return {}
+        
         try:
-            results = self.collection.query(
-                query_embeddings=None,
-                where={"job_id": job_id},
-                include=["documents", "metadatas"],
-                n_results=1
-            )
-            
-            if results['ids'][0]:
-                metadata = results['metadatas'][0][0]
-                doc = results['documents'][0][0]
-                
-                return {
-                    "title": metadata['title_clean'],
-                    "company": metadata['company_name'],
-                    "location": metadata['location'],
-                    "remote": metadata['remote_allowed'],
-                    "skills": metadata['combined_skills'],
-                    "job_id": metadata['job_id'],
-                    "document": doc
-                }
-            return None
+            results = self.collection.get(ids=chroma_ids, include=["documents", "metadatas"])
         except Exception as e:
-            print(f"Error retrieving job {job_id}: {e}")
-            return None
+            print(f"Error retrieving jobs {job_ids}: {e}")
+            return {}
+        
+        jobs = {}
+        for metadata, doc in zip(results['metadatas'], results['documents']):
+            jobs[str(metadata['job_id'])] = {
+                "title": metadata['title_clean'],
+                "company": metadata['company_name'],
+                "location": metadata['location'],
+                "remote": metadata['remote_allowed'],
+                "skills": metadata['combined_skills'],
+                "job_id": metadata['job_id'],
+                "document": doc
+            }
+        return jobs
 
 # Simple test code
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+import threading
+from collections import Counter
+from typing import Dict, Any
+
+
+class SearchTelemetry:
+    """
+    Thread-safe aggregate of how deep searches had to go into the index.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.rounds = 0
+        self.candidates_fetched = 0
+        self.short_results = 0
+        self.exhausted = 0
+        self.depth_histogram = Counter()
+
+    def record(self, search_stats: Dict[str, Any]):
+        """
+        Record the stats of one search.
+
+        Args:
+            search_stats: Dictionary with 'rounds', 'depth', 'candidates_fetched',
+                'returned', 'requested' and 'exhausted'
+        """
+        with self._lock:
+            self.searches += 1
+            self.rounds += search_stats["rounds"]
+            self.candidates_fetched += search_stats["candidates_fetched"]
+            self.depth_histogram[search_stats["depth"]] += 1
+            if search_stats["returned"] < search_stats["requested"]:
+                self.short_results += 1
+            if search_stats["exhausted"]:
+                self.exhausted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return aggregate depth statistics"""
+        with self._lock:
+            return {
+                "searches": self.searches,
+                "avg_rounds": self.rounds / self.searches if self.searches else 0.0,
+                "avg_candidates_fetched": self.candidates_fetched / self.searches if self.searches else 0.0,
+                "short_results": self.short_results,
+                "exhausted": self.exhausted,
+                "depth_histogram": {str(depth): count for depth, count in sorted(self.depth_histogram.items())}
+            }
@@ -1,6 +1,7 @@
 # streamlit_app.py (Streamlit frontend)
 import streamlit as st
 import requests
+import json
 import os
 
 # Default for local development
@@ -35,6 +36,9 @@ with st.sidebar:
         placeholder="E.g., New York, San Francisco"
     )
     
+    # Search radius around the preferred location
+    radius_miles = st.number_input("Within miles of location (0 = anywhere)", min_value=0, max_value=500, value=0, step=5)
+    
     # Remote option
     remote = st.checkbox("Remote positions only")
     
@@ -54,6 +58,8 @@ if search_button and query:
         st.write(f"**Skills:** {skills}")
     if location:
         st.write(f"**Location:** {location}")
+    if location and radius_miles:
+        st.write(f"**Within:** {radius_miles} miles")
     if remote:
         st.write("**Remote only:** Yes")
     
@@ -63,18 +69,26 @@ if search_button and query:
         "location": location if location else None,
         "remote": remote,
         "skills": skills if skills else None,
+        "radius_miles": radius_miles if location and radius_miles else None,
         "num_results": num_results
     }
     
-    # Call the API
-    with st.spinner("Searching for matching jobs..."):
-        try:
-            response = requests.post(f"{API_URL}/search", json=data)
-            if response.status_code == 200:
-                results = response.json()
+    # Call the streaming API: results render as soon as retrieval finishes,
+    # and each explanation fills in as it arrives
+    explanation_slots = {}
+    try:
+        with st.spinner("Searching for matching jobs..."):
+            response = requests.post(f"{API_URL}/search/stream", json=data, stream=True)
+        if response.status_code == 200:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
                 
-                # Show results
-                if results:
+                if event["type"] == "results":
+                    results = event["results"]
+                    if not results:
+                        st.warning("No matching jobs found. Try broadening your search criteria.")
                     for job in results:
                         with st.expander(f"{job['title']} at {job['company']} - {job['similarity']:.0%} match"):
                             st.write(f"**Company:** {job['company']}")
@@ -82,17 +96,21 @@ if search_button and query:
                             if job['remote']:
                                 st.write("**Remote:** Yes")
                             st.write(f"**Skills:** {job['skills']}")
-                            # Add Gemini's explanation in a highlighted box
-                            if "explanation" in job and job["explanation"]:
-                                st.info(f"**Why this matches your search:** {job['explanation']}")
+                            # Placeholder for Gemini's explanation, filled in when it arrives
+                            explanation_slots[job['job_id']] = st.empty()
+                            explanation_slots[job['job_id']].caption("Generating explanation...")
                             st.write(f"**Job Description:** {job['document']}")
                             st.markdown(f"[View on LinkedIn](https://www.linkedin.com/jobs/view/{job['job_id']})")
-                else:
-                    st.warning("No matching jobs found. Try broadening your search criteria.")
-            else:
-                st.error(f"Error: API returned status code {response.status_code}")
-                st.write(response.text)
-        except requests.exceptions.ConnectionError:
-            st.error(f"Could not connect to API at {API_URL}. Is the server running?")
+                
+                elif event["type"] == "explanation":
+                    slot = explanation_slots.get(event["job_id"])
+                    if slot is not None and event["explanation"]:
+                        # Add Gemini's explanation in a highlighted box
+                        slot.info(f"**Why this matches your search:** {event['explanation']}")
+        else:
+            st.error(f"Error: API returned status code {response.status_code}")
+            st.write(response.text)
+    except requests.exceptions.ConnectionError:
+        st.error(f"Could not connect to API at {API_URL}. Is the server running?")
 else:
     st.info("Enter your search criteria and click 'Search Jobs' to find matching positions.")
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Title/company caps in JobRetriever._rank_candidates.
+
+The caps are applied by the MMR selection, so they must hold whether or not
+more candidates pass the score threshold than results were asked for.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+retrieval = pytest.importorskip("retrieval.retrieval")
+
+class FixedScoreReranker:
+    """Reranker stand-in that scores every candidate 0.9, with no components"""
+
+    def score(self, metadatas, **kwargs):
+        return np.full(len(metadatas), 0.9, dtype=np.float32), len(metadatas)
+
+    def component_dicts(self, n_candidates):
+        return [{} for _ in range(n_candidates)]
+
+@pytest.fixture
+def retriever():
+    retriever = object.__new__(retrieval.JobRetriever)
+    retriever.reranker = FixedScoreReranker()
+    retriever.diversity_lambda = retrieval.DIVERSITY_LAMBDA
+    return retriever
+
+def _search():
+    return {
+        "filters": {},
+        "radius_job_ids": None,
+        "query_title": "software engineer",
+        "query_skills": [],
+        "query_location": None,
+        "query_coordinates": None
+    }
+
+def _candidates(n):
+    """n postings that all share one title and one company"""
+    metadatas = [
+        {
+            "job_id": str(i),
+            "title_clean": "Software Engineer",
+            "company_name": "Acme",
+            "location": "Austin, TX",
+            "remote_allowed": False,
+            "combined_skills": ""
+        }
+        for i in range(n)
+    ]
+    embeddings = list(np.random.default_rng(0).normal(size=(n, 8)).astype(np.float32))
+    return [f"doc {i}" for i in range(n)], metadatas, [0.1] * n, embeddings
+
+@pytest.mark.parametrize("n_candidates", [5, 6, 12])
+def test_caps_apply_regardless_of_pool_size(retriever, n_candidates):
+    documents, metadatas, distances, embeddings = _candidates(n_candidates)
+    results = retriever._rank_candidates(
+        _search(), {}, documents, metadatas, distances, n_results=5, embeddings=embeddings
+    )
+    cap = min(retrieval.MAX_RESULTS_PER_TITLE, retrieval.MAX_RESULTS_PER_COMPANY)
+    assert len(results) == cap
+    assert [r["rank"] for r in results] == list(range(1, cap + 1))
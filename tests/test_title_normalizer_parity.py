@@ -0,0 +1,53 @@
+"""
+Parity of the trie-based title normalizer with the original implementation.
+
+tests/data/title_normalizer_parity.jsonl holds outputs frozen from the
+word-span implementation that preceded the tries, one JSON array per line:
+[title, _normalize_role(title.lower()), *_extract_seniority(role), normalize(title)].
+The titles are hand-picked cases plus random compositions of the alias and
+seniority vocabularies with filler words, punctuation and mixed case.
+"""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from normalizers.title_normalizer import TitleNormalizer
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'title_normalizer_parity.jsonl')
+
+def _load_cases():
+    with open(FIXTURE_PATH, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+CASES = _load_cases()
+
+@pytest.fixture(scope="module")
+def normalizer():
+    return TitleNormalizer()
+
+def _mismatches(cases, actual):
+    """Describe the first few cases whose output differs from the frozen one"""
+    return [
+        f"{title!r}: expected {expected!r}, got {got!r}"
+        for (title, expected), got in zip(cases, actual)
+        if expected != got
+    ][:10]
+
+def test_normalize_role_matches_baseline(normalizer):
+    cases = [(title, role) for title, role, _, _, _ in CASES]
+    assert not _mismatches(cases, [normalizer._normalize_role(title.lower()) for title, _ in cases])
+
+def test_extract_seniority_matches_baseline(normalizer):
+    cases = [(role, (seniority, remaining)) for _, role, seniority, remaining, _ in CASES]
+    assert not _mismatches(cases, [normalizer._extract_seniority(role) for role, _ in cases])
+
+def test_normalize_matches_baseline(normalizer):
+    cases = [(title, normalized) for title, _, _, _, normalized in CASES]
+    assert not _mismatches(cases, [normalizer.normalize(title) for title, _ in cases])
+
+def test_normalize_series_matches_baseline(normalizer):
+    titles = pd.Series([title for title, _, _, _, _ in CASES])
+    expected = [normalized for _, _, _, _, normalized in CASES]
+    assert normalizer.normalize_series(titles).tolist() == expected
@@ -0,0 +1,125 @@
+import os
+import resource
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from normalizers import normalize_location
+from vector_db.stores import VectorStore, ChromaVectorStore, InProcessVectorStore
+
+# Filters benchmarked for every store, in Chroma where syntax; locations go
+# through the normalizer so they match the stored location_normalized values
+BENCHMARK_FILTERS = {
+    "none": None,
+    "remote": {"remote_allowed": True},
+    "remote_or_location": {"$or": [
+        {"remote_allowed": True},
+        {"location_normalized": {"$in": [normalize_location("New York, NY"), normalize_location("San Francisco, CA")]}}
+    ]}
+}
+
+def _rss_mb() -> float:
+    """Resident memory of this process in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        # Peak rather than current RSS where /proc is unavailable (KB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _open_store(name: str, db_path: Optional[str]) -> VectorStore:
+    if name == "chroma":
+        import chromadb
+        client = chromadb.PersistentClient(path=db_path or os.getenv("CHROMA_DB_PATH", "./chroma_db"))
+        return ChromaVectorStore(client.get_collection("job_listings"))
+    if name == "inprocess-exact":
+        return InProcessVectorStore.from_artifacts(mode="exact")
+    if name == "inprocess-ivf":
+        return InProcessVectorStore.from_artifacts(mode="ivf")
+    raise ValueError(f"Unknown store: {name}")
+
+def benchmark_stores(
+    stores: Optional[List[str]] = None,
+    n_queries: int = 200,
+    k: int = 40,
+    db_path: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Compare vector store backends on the same queries.
+
+    Queries are perturbed copies of random posting embeddings. Exact
+    in-process search is the ground truth for recall, so it always runs
+    first.
+
+    Args:
+        stores: Backends to compare: 'chroma', 'inprocess-exact', 'inprocess-ivf'
+        n_queries: Queries per filter
+        k: Results per query
+        db_path: Chroma database directory
+
+    Returns:
+        One row per (store, filter) with load time, memory added by loading
+        the store, p50/p95 query latency in ms and mean recall@k
+    """
+    stores = stores or ["inprocess-exact", "inprocess-ivf", "chroma"]
+    stores = ["inprocess-exact"] + [name for name in stores if name != "inprocess-exact"]
+
+    report = []
+    truth: Dict[str, List[set]] = {}
+    queries = None
+    for name in stores:
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        try:
+            store = _open_store(name, db_path)
+        except Exception as e:
+            if name == "inprocess-exact":
+                raise
+            print(f"Skipping {name}: {e}")
+            continue
+        load_seconds = time.perf_counter() - started
+        memory_mb = _rss_mb() - rss_before
+
+        if queries is None:
+            # Ground-truth store is loaded first; draw the query vectors from its matrix
+            rng = np.random.default_rng(0)
+            sample = rng.choice(store.count(), size=min(n_queries, store.count()), replace=False)
+            vectors = np.asarray(store.embeddings[np.sort(sample)], dtype=np.float32)
+            queries = vectors + rng.normal(scale=0.05 * float(np.abs(vectors).mean()), size=vectors.shape).astype(np.float32)
+
+        for filter_name, where in BENCHMARK_FILTERS.items():
+            latencies = []
+            results = []
+            for query in queries:
+                started = time.perf_counter()
+                response = store.query(query_embeddings=[query.tolist()], n_results=k, where=where, include=["distances"])
+                latencies.append((time.perf_counter() - started) * 1000)
+                results.append(set(response["ids"][0]))
+
+            if name == "inprocess-exact":
+                truth[filter_name] = results
+            recall = np.mean([
+                len(found & expected) / max(len(expected), 1)
+                for found, expected in zip(results, truth[filter_name])
+            ])
+            row = {
+                "store": name,
+                "filter": filter_name,
+                "load_seconds": round(load_seconds, 2),
+                "memory_mb": round(memory_mb, 1),
+                "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+                f"recall@{k}": round(float(recall), 4)
+            }
+            print(row)
+            report.append(row)
+        del store
+    return report
+
+if __name__ == "__main__":
+    benchmark_stores(
+        stores=os.getenv("VECTOR_STORE_BENCHMARK", "inprocess-exact,inprocess-ivf,chroma").split(","),
+        n_queries=int(os.getenv("VECTOR_STORE_BENCHMARK_QUERIES", 200)),
+        k=int(os.getenv("VECTOR_STORE_BENCHMARK_K", 40))
+    )
@@ -1,43 +1,76 @@
 import chromadb
 import pandas as pd
-import pickle
 import numpy as np
 import os
+import hashlib
+import json
+import time
+from typing import Dict, Optional
 
-def build_vector_database():
-    print("Building vector database...")
-    
-    # Define database path - could be from environment variable for flexibility
-    db_path = os.environ.get("CHROMA_DB_PATH", "./chroma_db")
-    
-    # Check if the database already exists
-    if os.path.exists(db_path) and os.listdir(db_path):
-        print("Database already exists. Skipping build.")
-        return
-    
-    # Create directory if it doesn't exist
-    os.makedirs(db_path, exist_ok=True)
-    
-    # Load your data with error handling
+from embedding.models import get_backend
+from embedding.vector_embedding import MODEL_NAME, FIELD_WEIGHTS
+from preprocess.artifacts import load_embeddings
+from vector_db.stores import METADATA_COLUMNS, ChromaVectorStore, load_index_postings
+
+COLLECTION_NAME = "job_listings"
+MANIFEST_FILE = "index_manifest.json"
+
+def embedding_identity() -> str:
+    """The model, backend and field weights the embedding stage uses"""
+    return json.dumps({"model": MODEL_NAME, "backend": get_backend(), "weights": FIELD_WEIGHTS}, sort_keys=True)
+
+def fingerprint_posting(document: str, metadata: Dict, embedded_fields: Dict, identity: str) -> str:
+    """
+    Content fingerprint of one posting as stored in the index.
+
+    Covers the document, every metadata field, the field values the embedding
+    is computed from and the embedding model identity, so a changed posting
+    or a re-embedding with another model both count as changes. The embedding
+    bytes themselves are left out: re-encoding an unchanged posting can differ
+    in the last bits depending on batch composition.
+    """
+    digest = hashlib.sha1()
+    digest.update(document.encode('utf-8'))
+    digest.update(json.dumps(metadata, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(json.dumps(embedded_fields, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(identity.encode('utf-8'))
+    return digest.hexdigest()
+
+def corpus_fingerprint(fingerprints: Dict[str, str]) -> str:
+    """Order-independent fingerprint of a whole {id: fingerprint} mapping"""
+    digest = hashlib.sha1()
+    for chroma_id in sorted(fingerprints):
+        digest.update(f"{chroma_id}\x1f{fingerprints[chroma_id]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def load_manifest(db_path: str) -> Optional[Dict]:
+    """Read the index manifest, or None if there is none"""
+    path = os.path.join(db_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
     try:
-        print("Loading job data and embeddings...")
-        df = pd.read_pickle('data/tmp/linkedin_jobs_with_embeddings.pkl')
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
     except Exception as e:
-        print(f"Error loading data: {e}")
-        raise
+        print(f"Ignoring unreadable index manifest: {e}")
+        return None
 
-    # Initialize Chroma client
-    print(f"Initializing Chroma database at {db_path}")
-    client = chromadb.PersistentClient(path="./chroma_db")
-    
-    # Create a collection for job listings
+def write_manifest(db_path: str, manifest: Dict):
+    """Write the index manifest atomically"""
+    path = os.path.join(db_path, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+def get_or_create_collection(client):
+    """Open the job collection, creating it if it does not exist"""
     try:
-        collection = client.get_collection("job_listings")
-        print("Collection 'job_listings' already exists")
+        collection = client.get_collection(COLLECTION_NAME)
+        print(f"Collection '{COLLECTION_NAME}' already exists")
     except Exception:
-        print("Creating new collection 'job_listings'")
+        print(f"Creating new collection '{COLLECTION_NAME}'")
         collection = client.create_collection(
-            name="job_listings",
+            name=COLLECTION_NAME,
             metadata={"hnsw:space": "cosine"},
             configuration={
                 "hnsw": {
@@ -46,38 +79,133 @@ def build_vector_database():
                 }
             }
         )
-    
+    return collection
+
+def build_vector_database(db_path: Optional[str] = None, batch_size: int = 500) -> Dict[str, int]:
+    """
+    Bring the vector database in line with the current postings.
+
+    Each posting is fingerprinted and compared against the index manifest
+    from the previous build: new and changed postings are upserted, postings
+    that disappeared are deleted, and unchanged ones are left alone. When the
+    corpus fingerprint matches the manifest the build is a no-op. Without a
+    manifest (first build or an older database) every posting is upserted and
+    any id not in the current corpus is removed.
+
+    Args:
+        db_path: Database directory; defaults to CHROMA_DB_PATH or ./chroma_db
+        batch_size: Postings per upsert/delete call
+
+    Returns:
+        Counts of 'added', 'updated', 'deleted' and 'unchanged' postings
+    """
+    print("Building vector database...")
+
+    # Define database path - could be from environment variable for flexibility
+    db_path = db_path or os.environ.get("CHROMA_DB_PATH", "./chroma_db")
+
+    # Create directory if it doesn't exist
+    os.makedirs(db_path, exist_ok=True)
+
+    metadata_columns = METADATA_COLUMNS
+
+    # Load your data with error handling; the embedding matrix is memory-mapped
+    try:
+        print("Loading job data and embeddings...")
+        embedded_columns = [c for c in FIELD_WEIGHTS if c not in metadata_columns]
+        df = load_index_postings(columns=embedded_columns + ['combined_text'])
+        embeddings = load_embeddings()
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        raise
+    if len(embeddings) != len(df):
+        raise ValueError(f"Embedding matrix has {len(embeddings)} rows but there are {len(df)} postings; re-run the embedding stage")
+
+    # Key documents by job_id so jobs can be fetched directly by id
+    duplicates = df['job_id'].duplicated()
+    rows = np.flatnonzero(~duplicates.to_numpy())
+    if duplicates.any():
+        print(f"Dropping {int(duplicates.sum())} postings with duplicate job_id")
+        df = df.iloc[rows].reset_index(drop=True)
+
     # Prepare your data for insertion
-    ids = [str(i) for i in range(len(df))]
+    ids = df['job_id'].astype(str).tolist()
     documents = df['combined_text'].tolist()
-    metadatas = df[['job_id', 'company_name', 'title_clean', 'location', 'location_normalized', 'remote_allowed', 'combined_skills']].to_dict('records')
-    
-    # Get embeddings
-    embeddings = np.array(df['embedding'].tolist())
-    
-    # Add documents in batches
-    batch_size = 500
-    total_batches = (len(df) - 1) // batch_size + 1
-    
-    for i in range(0, len(df), batch_size):
-        end_idx = min(i + batch_size, len(df))
-        batch_num = i // batch_size + 1
-        
-        print(f"Adding batch {batch_num}/{total_batches} ({end_idx-i} documents)...")
-        
+
+    # Chroma metadata cannot hold missing values, so leave unknown coordinates and states out
+    metadatas = [
+        {key: value for key, value in record.items() if not pd.isna(value)}
+        for record in df[metadata_columns].to_dict('records')
+    ]
+
+    identity = embedding_identity()
+    embedded_fields = df[list(FIELD_WEIGHTS)].to_dict('records')
+    fingerprints = {
+        chroma_id: fingerprint_posting(document, metadata, fields, identity)
+        for chroma_id, document, metadata, fields in zip(ids, documents, metadatas, embedded_fields)
+    }
+    corpus = corpus_fingerprint(fingerprints)
+
+    # Initialize Chroma client
+    print(f"Initializing Chroma database at {db_path}")
+    client = chromadb.PersistentClient(path=db_path)
+    store = ChromaVectorStore(get_or_create_collection(client))
+
+    manifest = load_manifest(db_path)
+    if manifest and manifest.get("corpus_fingerprint") == corpus and store.count() == len(ids):
+        print(f"Index is up to date with {len(ids)} documents. Nothing to do.")
+        return {"added": 0, "updated": 0, "deleted": 0, "unchanged": len(ids)}
+
+    previous = manifest.get("fingerprints", {}) if manifest else {}
+    existing_ids = set(previous)
+    if store.count() != len(existing_ids):
+        # No manifest, or an interrupted build left the collection out of step with it
+        existing_ids |= set(store.get(include=[])['ids'])
+
+    changed = [i for i, chroma_id in enumerate(ids) if previous.get(chroma_id) != fingerprints[chroma_id]]
+    removed = sorted(existing_ids - set(ids))
+    added = sum(1 for i in changed if ids[i] not in existing_ids)
+    counts = {
+        "added": added,
+        "updated": len(changed) - added,
+        "deleted": len(removed),
+        "unchanged": len(ids) - len(changed)
+    }
+    print(f"Index delta: {counts}")
+
+    for start in range(0, len(removed), batch_size):
+        store.delete(ids=removed[start:start + batch_size])
+
+    # Upsert new and changed documents in batches
+    total_batches = (len(changed) - 1) // batch_size + 1 if changed else 0
+    for start in range(0, len(changed), batch_size):
+        batch = changed[start:start + batch_size]
+        batch_num = start // batch_size + 1
+
+        print(f"Upserting batch {batch_num}/{total_batches} ({len(batch)} documents)...")
+
         try:
-            collection.add(
-                ids=ids[i:end_idx],
-                embeddings=embeddings[i:end_idx].tolist(),
-                documents=documents[i:end_idx],
-                metadatas=metadatas[i:end_idx]
+            store.upsert(
+                ids=[ids[i] for i in batch],
+                embeddings=np.asarray(embeddings[rows[batch]], dtype=np.float32).tolist(),
+                documents=[documents[i] for i in batch],
+                metadatas=[metadatas[i] for i in batch]
             )
-            print(f"Successfully added batch {batch_num}")
         except Exception as e:
-            print(f"Error adding batch {batch_num}: {e}")
+            print(f"Error upserting batch {batch_num}: {e}")
             raise
-        
-    print(f"Successfully added {len(df)} documents to the database")
+
+    # Only record the new state once the collection matches it
+    write_manifest(db_path, {
+        "collection": COLLECTION_NAME,
+        "updated_at": time.time(),
+        "documents": len(ids),
+        "corpus_fingerprint": corpus,
+        "fingerprints": fingerprints
+    })
+
+    print(f"Index now holds {store.count()} documents")
+    return counts
 
 if __name__ == "__main__":
-    build_vector_database()
\ No newline at end of file
+    build_vector_database()
@@ -0,0 +1,362 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from normalizers import location_state, map_unique
+from preprocess.artifacts import JOBS_PATH, load_jobs, load_embeddings
+
+# Metadata stored with every posting, as in build_vector_database
+METADATA_COLUMNS = ['job_id', 'company_name', 'title_clean', 'location', 'location_normalized', 'location_state',
+                    'remote_allowed', 'combined_skills', 'location_latitude', 'location_longitude']
+
+# Rows processed at a time when scanning the embedding matrix, and the most
+# (row, query) scores held at once by an exact scan (16M floats = 64 MB)
+SCAN_CHUNK_ROWS = 65536
+SCAN_BLOCK_SCORES = 16 * 1024 * 1024
+
+def load_index_postings(jobs_path: Optional[str] = None, columns: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Load the postings with the metadata columns stored in the index.
+
+    location_state is derived from location_normalized for postings cleaned
+    before that column existed.
+
+    Args:
+        jobs_path: Cleaned postings Parquet file; defaults to JOBS_PATH
+        columns: Extra columns to load
+
+    Returns:
+        DataFrame with METADATA_COLUMNS and the extra columns
+    """
+    jobs_path = jobs_path or JOBS_PATH
+    available = set(pq.read_schema(jobs_path).names)
+    wanted = list(dict.fromkeys(METADATA_COLUMNS + list(columns)))
+    jobs = load_jobs(jobs_path, columns=[c for c in wanted if c != 'location_state' or c in available])
+    if 'location_state' not in jobs.columns:
+        jobs['location_state'] = map_unique(jobs['location_normalized'], location_state)
+    return jobs
+
+class VectorStore(ABC):
+    """
+    Read interface the retriever needs from a vector index.
+
+    Mirrors the subset of the Chroma collection API in use, with the same
+    argument names, where-clause syntax and result layout, so stores are
+    interchangeable.
+    """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of postings in the index"""
+
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances")
+    ) -> Dict[str, List[List[Any]]]:
+        """Nearest neighbours by cosine distance; one result list per query embedding"""
+
+    @abstractmethod
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas")
+    ) -> Dict[str, List[Any]]:
+        """Postings by id and/or where clause"""
+
+class ChromaVectorStore(VectorStore):
+    """The persistent Chroma collection; also the write path used by build_vector_database"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def query(self, query_embeddings, n_results, where=None, include=("documents", "metadatas", "distances")):
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=list(include)
+        )
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas")):
+        return self.collection.get(ids=ids, where=where, include=list(include))
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[Dict[str, Any]]):
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def delete(self, ids: List[str]):
+        self.collection.delete(ids=ids)
+
+class InProcessVectorStore(VectorStore):
+    """
+    Read-only index over the memory-mapped embedding matrix of the pipeline artifacts.
+
+    'exact' mode scores every eligible posting in bounded chunks, keeping a
+    running top n per query with argpartition. 'ivf' mode clusters the postings
+    into n_lists k-means lists and only scores the n_probe lists closest to
+    the query, falling back to an exact scan when the probed lists hold
+    fewer eligible postings than requested. Where clauses use the Chroma
+    syntax ($and, $or, $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte) and are
+    evaluated as boolean masks over metadata columns.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadata: pd.DataFrame,
+        embeddings: np.ndarray,
+        mode: Optional[str] = None,
+        n_lists: Optional[int] = None,
+        n_probe: Optional[int] = None
+    ):
+        """
+        Args:
+            ids: Id of each posting
+            documents: Document text of each posting
+            metadata: Metadata columns, row-aligned with ids
+            embeddings: (n, d) embedding matrix, typically memory-mapped
+            mode: 'exact' or 'ivf'; defaults to VECTOR_STORE_MODE
+            n_lists: Number of IVF lists; defaults to VECTOR_STORE_IVF_LISTS or about sqrt(n)
+            n_probe: Lists scanned per IVF query; defaults to VECTOR_STORE_IVF_PROBES
+        """
+        self.ids = np.asarray(ids, dtype=object)
+        self.documents = np.asarray(documents, dtype=object)
+        self.columns = {column: metadata[column].to_numpy() for column in metadata.columns}
+        self.embeddings = embeddings
+        self._row_of = {chroma_id: row for row, chroma_id in enumerate(self.ids.tolist())}
+
+        # Row norms for cosine scoring, so the matrix itself is never copied
+        self.norms = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), SCAN_CHUNK_ROWS):
+            self.norms[start:start + SCAN_CHUNK_ROWS] = np.linalg.norm(
+                np.asarray(embeddings[start:start + SCAN_CHUNK_ROWS], dtype=np.float32), axis=1
+            )
+        self.norms[self.norms == 0] = 1.0
+
+        self.mode = (mode or os.getenv("VECTOR_STORE_MODE", "exact")).lower()
+        if self.mode not in ("exact", "ivf"):
+            raise ValueError(f"Unknown in-process index mode: {self.mode}")
+        if self.mode == "ivf":
+            self.n_lists = n_lists or int(os.getenv("VECTOR_STORE_IVF_LISTS", 0)) or max(1, int(np.sqrt(len(self.ids))))
+            self.n_probe = n_probe or int(os.getenv("VECTOR_STORE_IVF_PROBES", 8))
+            self._train_ivf()
+
+    @classmethod
+    def from_artifacts(cls, jobs_path: Optional[str] = None, embeddings_path: Optional[str] = None, **kwargs) -> "InProcessVectorStore":
+        """
+        Load the store from the cleaned postings and the embedding matrix.
+
+        Postings with a duplicate job_id are dropped as in build_vector_database.
+        """
+        jobs = load_index_postings(jobs_path, columns=['combined_text'])
+        embeddings = load_embeddings(embeddings_path)
+        if len(embeddings) != len(jobs):
+            raise ValueError(f"Embedding matrix has {len(embeddings)} rows but there are {len(jobs)} postings")
+
+        duplicates = jobs['job_id'].duplicated().to_numpy()
+        if duplicates.any():
+            keep = np.flatnonzero(~duplicates)
+            jobs = jobs.iloc[keep].reset_index(drop=True)
+            embeddings = embeddings[keep]
+
+        store = cls(
+            ids=jobs['job_id'].astype(str).tolist(),
+            documents=jobs['combined_text'].tolist(),
+            metadata=jobs[METADATA_COLUMNS],
+            embeddings=embeddings,
+            **kwargs
+        )
+        print(f"Loaded in-process {store.mode} index over {store.count()} postings")
+        return store
+
+    def _train_ivf(self):
+        """Cluster the postings into inverted lists with mini-batch k-means"""
+        from sklearn.cluster import MiniBatchKMeans
+
+        n = len(self.ids)
+        sample_size = min(n, max(self.n_lists * 40, 10000))
+        sample = np.sort(np.random.default_rng(0).choice(n, size=sample_size, replace=False))
+        kmeans = MiniBatchKMeans(n_clusters=min(self.n_lists, sample_size), random_state=0, n_init=3)
+        kmeans.fit(np.asarray(self.embeddings[sample], dtype=np.float32) / self.norms[sample, None])
+
+        centroids = kmeans.cluster_centers_.astype(np.float32)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        self.centroids = centroids
+
+        assignments = np.empty(n, dtype=np.int32)
+        for start in range(0, n, SCAN_CHUNK_ROWS):
+            chunk = np.asarray(self.embeddings[start:start + SCAN_CHUNK_ROWS], dtype=np.float32)
+            assignments[start:start + SCAN_CHUNK_ROWS] = np.argmax(chunk @ centroids.T, axis=1)
+
+        # Rows grouped by list, with offsets delimiting each list
+        self.list_rows = np.argsort(assignments, kind='stable').astype(np.int64)
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=len(centroids)))])
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def _condition_mask(self, field: str, condition: Any) -> np.ndarray:
+        """Mask of rows whose field satisfies one where condition"""
+        column = self.columns.get(field)
+        if column is None:
+            return np.zeros(len(self.ids), dtype=bool)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        mask = np.ones(len(self.ids), dtype=bool)
+        for operator, value in condition.items():
+            if operator == "$eq":
+                mask &= column == value
+            elif operator == "$ne":
+                mask &= column != value
+            elif operator == "$in":
+                mask &= pd.Series(column).isin(list(value)).to_numpy()
+            elif operator == "$nin":
+                mask &= ~pd.Series(column).isin(list(value)).to_numpy()
+            elif operator in ("$gt", "$gte", "$lt", "$lte"):
+                compare = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}[operator]
+                mask &= compare(column, value)
+            else:
+                raise ValueError(f"Unsupported where operator: {operator}")
+        return mask
+
+    def _where_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Evaluate a Chroma-style where clause into a row mask (None means every row)"""
+        if not where:
+            return None
+        masks = []
+        for key, value in where.items():
+            if key == "$and":
+                masks.append(np.logical_and.reduce([self._where_mask(c) for c in value]))
+            elif key == "$or":
+                masks.append(np.logical_or.reduce([self._where_mask(c) for c in value]))
+            else:
+                masks.append(self._condition_mask(key, value))
+        return np.logical_and.reduce(masks)
+
+    def _metadata(self, row: int) -> Dict[str, Any]:
+        """Metadata dict of one row, leaving out missing values as Chroma does"""
+        metadata = {}
+        for column, values in self.columns.items():
+            value = values[row]
+            if not pd.isna(value):
+                metadata[column] = value.item() if isinstance(value, np.generic) else value
+        return metadata
+
+    def _results(self, rows: np.ndarray, include: Sequence[str]) -> Dict[str, List[Any]]:
+        """Result lists for a set of rows"""
+        result = {"ids": self.ids[rows].tolist()}
+        if "documents" in include:
+            result["documents"] = self.documents[rows].tolist()
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadata(row) for row in rows.tolist()]
+        if "embeddings" in include:
+            result["embeddings"] = list(np.asarray(self.embeddings[rows], dtype=np.float32))
+        return result
+
+    def _exact_top(self, queries: np.ndarray, eligible: np.ndarray, n_results: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top n eligible rows for each normalized query.
+
+        Eligible rows are scanned in chunks sized so one chunk's score block
+        stays under SCAN_BLOCK_SCORES, and a running top n per query is merged
+        with each chunk, so memory does not grow with the corpus.
+
+        Returns:
+            (rows, scores), each of shape (n_queries, n_results), best first
+        """
+        n_queries = len(queries)
+        best_rows = np.empty((n_queries, 0), dtype=np.int64)
+        best_scores = np.empty((n_queries, 0), dtype=np.float32)
+        chunk_rows = max(1, min(SCAN_CHUNK_ROWS, SCAN_BLOCK_SCORES // max(n_queries, 1)))
+        contiguous = len(eligible) == len(self.ids)
+
+        for start in range(0, len(eligible), chunk_rows):
+            rows = eligible[start:start + chunk_rows]
+            # A slice reads the memory map sequentially; a filtered scan gathers only eligible rows
+            chunk = self.embeddings[start:start + len(rows)] if contiguous else self.embeddings[rows]
+            scores = (np.asarray(chunk, dtype=np.float32) @ queries.T).T / self.norms[rows]
+
+            candidate_scores = np.concatenate([best_scores, scores], axis=1)
+            candidate_rows = np.concatenate([best_rows, np.broadcast_to(rows, scores.shape)], axis=1)
+            if candidate_scores.shape[1] > n_results:
+                keep = np.argpartition(-candidate_scores, n_results - 1, axis=1)[:, :n_results]
+                candidate_scores = np.take_along_axis(candidate_scores, keep, axis=1)
+                candidate_rows = np.take_along_axis(candidate_rows, keep, axis=1)
+            best_scores, best_rows = candidate_scores, candidate_rows
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    @staticmethod
+    def _top(rows: np.ndarray, scores: np.ndarray, n_results: int):
+        """The n best (row, score) pairs, best first"""
+        if len(rows) > n_results:
+            best = np.argpartition(-scores, n_results - 1)[:n_results]
+            rows, scores = rows[best], scores[best]
+        order = np.argsort(-scores, kind='stable')
+        return rows[order], scores[order]
+
+    def _ivf_candidates(self, query: np.ndarray, mask: Optional[np.ndarray]) -> np.ndarray:
+        """Eligible rows in the lists closest to the query"""
+        probes = np.argsort(-(self.centroids @ query))[:self.n_probe]
+        rows = np.concatenate([self.list_rows[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probes])
+        return rows[mask[rows]] if mask is not None else rows
+
+    def query(self, query_embeddings, n_results, where=None, include=("documents", "metadatas", "distances")):
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        mask = self._where_mask(where)
+        eligible = np.flatnonzero(mask) if mask is not None else np.arange(len(self.ids))
+        n_results = min(n_results, len(eligible))
+
+        response = {key: [] for key in ("ids", "documents", "metadatas", "distances", "embeddings") if key == "ids" or key in include}
+        if n_results <= 0:
+            for key in response:
+                response[key] = [[] for _ in queries]
+            return response
+
+        # IVF answers from the probed lists; queries whose lists hold too few
+        # eligible postings, and every query in exact mode, get an exact scan
+        top: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(queries)
+        if self.mode == "ivf":
+            for i, query in enumerate(queries):
+                rows = self._ivf_candidates(query, mask)
+                if len(rows) >= n_results:
+                    rows = np.sort(rows)
+                    scores = (np.asarray(self.embeddings[rows], dtype=np.float32) @ query) / self.norms[rows]
+                    top[i] = self._top(rows, scores, n_results)
+        exact = [i for i, result in enumerate(top) if result is None]
+        if exact:
+            rows, scores = self._exact_top(queries[exact], eligible, n_results)
+            for j, i in enumerate(exact):
+                top[i] = rows[j], scores[j]
+
+        for rows, scores in top:
+            result = self._results(rows, include)
+            result["distances"] = (1.0 - scores).tolist()
+            for key in response:
+                response[key].append(result[key])
+        return response
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas")):
+        if ids is not None:
+            rows = np.array([self._row_of[i] for i in ids if i in self._row_of], dtype=np.int64)
+        else:
+            rows = np.arange(len(self.ids))
+        mask = self._where_mask(where)
+        if mask is not None:
+            rows = rows[mask[rows]]
+        return self._results(rows, include)